@@ -3,6 +3,8 @@ import layout
 import callbacks
 import os
 import dash_uploader as du
+import metricas
+from utils.diccionarios import obtener_tablas
 
 # Establecer ruta base
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
@@ -14,8 +16,15 @@ app = Dash(__name__, suppress_callback_exceptions=True)
 UPLOAD_FOLDER_ROOT = os.path.join(os.getcwd(), 'uploads')
 du.configure_upload(app, UPLOAD_FOLDER_ROOT)
 
+# Métricas por etapa del pipeline en /metrics (y trazas por request opcionales)
+app.server.register_blueprint(metricas.bp)
+
+# Compilar/cargar los diccionarios antes de atender requests
+obtener_tablas()
+
 # Layout y callbacks
-app.layout = layout.create_layout(app)
+# Layout como función: cada carga de la página recibe su propio upload_id (su sesión)
+app.layout = lambda: layout.create_layout(app)
 callbacks.register_callbacks(app)
 
 # Ejecutar
@@ -0,0 +1,89 @@
+"""
+Mide el arranque del dashboard: tiempo de `import app` en un proceso nuevo,
+tiempo desde que se lanza `python app.py` hasta la primera respuesta HTTP
+y costo de la primera carga de los datos de referencia (que ya no se leen al
+importar utils.helpers).
+
+Uso: python benchmarks/bench_arranque.py [--repeticiones 3] [--puerto 8050] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir_en_proceso(codigo):
+    # Cada medición en un intérprete nuevo, para no contar módulos ya importados
+    salida = subprocess.run(
+        [sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    return float(salida.stdout.strip().splitlines()[-1])
+
+
+def medir_import_app():
+    return medir_en_proceso(
+        "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    )
+
+
+def medir_referencias():
+    return medir_en_proceso(
+        "import time; from utils.helpers import obtener_import_dict, obtener_comunas, obtener_puertos; "
+        "t = time.perf_counter(); obtener_import_dict(); obtener_comunas(); obtener_puertos(); "
+        "print(time.perf_counter() - t)"
+    )
+
+
+def medir_primera_respuesta(puerto, espera_maxima=120):
+    entorno = dict(os.environ, PORT=str(puerto))
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, 'app.py'], cwd=RAIZ, env=entorno,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - inicio < espera_maxima:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{puerto}/', timeout=1) as respuesta:
+                    if respuesta.status == 200:
+                        return time.perf_counter() - inicio
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.05)
+        raise TimeoutError(f"El servidor no respondió en {espera_maxima}s")
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--puerto', type=int, default=8050)
+    parser.add_argument('--json', action='store_true', help='Imprime los resultados como JSON')
+    args = parser.parse_args()
+
+    resultados = {'import_app_s': [], 'primera_respuesta_s': [], 'referencias_s': []}
+    for _ in range(args.repeticiones):
+        resultados['import_app_s'].append(medir_import_app())
+        resultados['referencias_s'].append(medir_referencias())
+        resultados['primera_respuesta_s'].append(medir_primera_respuesta(args.puerto))
+
+    resumen = {nombre: round(min(tiempos), 4) for nombre, tiempos in resultados.items()}
+    resumen['repeticiones'] = args.repeticiones
+
+    if args.json:
+        print(json.dumps(resumen, ensure_ascii=False))
+        return
+    print(f"import app           {resumen['import_app_s']:>8.3f}s")
+    print(f"primera respuesta    {resumen['primera_respuesta_s']:>8.3f}s")
+    print(f"datos de referencia  {resumen['referencias_s']:>8.3f}s (primera carga, fuera del arranque)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Mide las etapas del pipeline sobre DIN sintéticos de distintos tamaños:
+lectura cruda (leer_txt_sin_encabezado), ingesta completa (procesar_archivo,
+lo que corría en process_upload), enriquecer_dataframe, agregar_section y
+el armado de cada panel del dashboard (lo que antes hacía update_visualizations).
+
+Uso: python benchmarks/bench_pipeline.py [--filas 10000 1000000 10000000] [--json]
+                                         [--omitir leer_txt_sin_encabezado] [--datos benchmarks/datos]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(RAIZ)
+
+import utils.cache_procesados as cache_procesados  # noqa: E402
+from generar_din import generar_din  # noqa: E402
+from utils.almacen_datasets import liberar_dataset, registrar_dataset  # noqa: E402
+from utils.helpers import agregar_section, enriquecer_dataframe, leer_txt_sin_encabezado, mapear_importadores  # noqa: E402
+from utils.ingesta import COLUMNAS_SELECCION  # noqa: E402
+from utils.trabajos import procesar_archivo  # noqa: E402
+
+ETAPAS = ['leer_txt_sin_encabezado', 'procesar_archivo', 'enriquecer_dataframe', 'agregar_section', 'paneles']
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def medir_paneles(df):
+    # Igual que los callbacks de los paneles: filtros sobre el handle y constructor de cada pestaña
+    from callbacks import armar_filtros, filtrar_dataset
+    from paneles import PANELES
+
+    handle = registrar_dataset(df)
+    try:
+        filtros = armar_filtros(df['DD'].min(), df['DD'].max(), *[None] * 7)
+        tiempos = {}
+        for panel, constructor in PANELES.items():
+            def armar():
+                filtrado, contexto = filtrar_dataset(handle, filtros)
+                contexto['columna'] = 'NUM_UNICO_IMPORTADOR'
+                return constructor(filtrado, contexto)
+            tiempos[panel] = round(medir(armar)[0], 4)
+        return tiempos
+    finally:
+        liberar_dataset(handle['dataset_id'])
+
+
+def medir_tamano(filas, carpeta_datos, omitir):
+    ruta = os.path.join(carpeta_datos, f'din_{filas}.txt')
+    if not os.path.exists(ruta):
+        generar_din(filas, ruta)
+
+    resultado = {'filas': filas, 'bytes': os.path.getsize(ruta)}
+    if 'leer_txt_sin_encabezado' not in omitir:
+        resultado['leer_txt_sin_encabezado_s'], crudo = medir(lambda: leer_txt_sin_encabezado(ruta))
+    else:
+        crudo = None
+
+    # Caché de procesados vacío: se mide el pipeline completo, no la lectura del caché
+    with tempfile.TemporaryDirectory() as carpeta_cache:
+        cache_procesados.CARPETA_PROCESADOS = carpeta_cache
+        resultado['procesar_archivo_s'], (_, procesado) = medir(lambda: procesar_archivo(ruta))
+
+    if crudo is not None:
+        base = crudo[COLUMNAS_SELECCION].copy()
+        base['NUM_UNICO_IMPORTADOR'] = mapear_importadores(base['NUM_UNICO_IMPORTADOR'])
+        if 'enriquecer_dataframe' not in omitir:
+            resultado['enriquecer_dataframe_s'], _ = medir(lambda: enriquecer_dataframe(base.copy()))
+        if 'agregar_section' not in omitir:
+            resultado['agregar_section_s'], _ = medir(lambda: agregar_section(base.copy()))
+        del crudo, base
+
+    if 'paneles' not in omitir:
+        resultado['paneles_s'] = medir_paneles(procesado)
+
+    return {clave: round(valor, 4) if isinstance(valor, float) else valor for clave, valor in resultado.items()}
+
+
+@contextmanager
+def logs_a_stderr():
+    # Los prints del pipeline (también los de los procesos hijos, que heredan el fd 1)
+    # van a stderr, así stdout queda solo para el JSON
+    sys.stdout.flush()
+    original = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(original, 1)
+        os.close(original)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--datos', default=os.path.join('benchmarks', 'datos'),
+                        help='Carpeta donde se generan (y reutilizan) los TXT sintéticos')
+    parser.add_argument('--omitir', nargs='*', default=[], choices=ETAPAS)
+    parser.add_argument('--json', action='store_true', help='Imprime los resultados como JSON')
+    args = parser.parse_args()
+
+    os.makedirs(args.datos, exist_ok=True)
+    with logs_a_stderr() if args.json else nullcontext():
+        resultados = [medir_tamano(filas, args.datos, set(args.omitir)) for filas in args.filas]
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False))
+        return
+    for r in resultados:
+        print(f"— {r['filas']:,} filas ({r['bytes'] / 1024 ** 2:,.1f} MB)")
+        for clave, valor in r.items():
+            if clave.endswith('_s') and not isinstance(valor, dict):
+                print(f"   {clave[:-2]:<26} {valor:>9.3f}s")
+        for panel, valor in r.get('paneles_s', {}).items():
+            print(f"   panel {panel:<20} {valor:>9.3f}s")
+
+
+if __name__ == '__main__':
+    main()
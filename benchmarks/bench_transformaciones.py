@@ -0,0 +1,99 @@
+"""
+Compara las transformaciones fila a fila (.apply) contra las versiones que
+calculan sobre valores únicos: industria por ARANC_NAC, razón social del
+importador y normalización de comunas.
+
+Uso: python benchmarks/bench_transformaciones.py [--filas 1000000] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from utils.helpers import (  # noqa: E402
+    asignar_industria, asignar_industria_serie, eliminar_acentos, mapear_importadores, normalizar_texto_serie,
+    obtener_comunas, obtener_import_dict
+)
+
+
+def medir(funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def pesos_zipf(n):
+    # Distribución sesgada como en el DIN: pocos códigos concentran la mayoría de las filas
+    p = 1 / np.arange(1, n + 1)
+    return p / p.sum()
+
+
+def datos_sinteticos(filas, semilla=0):
+    rng = np.random.default_rng(semilla)
+    aranceles = rng.integers(1_000_000, 99_999_999, size=5_000)
+    ruts = np.array(list(obtener_import_dict().keys()) or ['76038806'])
+    comunas = obtener_comunas()['nombre'].str.upper().to_numpy()
+    return {
+        'ARANC_NAC': pd.Series(rng.choice(aranceles, size=filas, p=pesos_zipf(len(aranceles))).astype(str)),
+        'NUM_UNICO_IMPORTADOR': pd.Series(rng.choice(ruts, size=filas, p=pesos_zipf(len(ruts)))),
+        'CODCOMUN': pd.Series(rng.choice(comunas, size=filas, p=pesos_zipf(len(comunas)))).astype('category'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--json', action='store_true', help='Imprime los resultados como JSON')
+    args = parser.parse_args()
+
+    datos = datos_sinteticos(args.filas)
+    import_dict = obtener_import_dict()
+    casos = {
+        'asignar_industria': (
+            lambda: datos['ARANC_NAC'].apply(asignar_industria),
+            lambda: asignar_industria_serie(datos['ARANC_NAC']),
+        ),
+        'importador': (
+            lambda: datos['NUM_UNICO_IMPORTADOR'].astype(str).apply(lambda x: import_dict.get(str(x), x)),
+            lambda: mapear_importadores(datos['NUM_UNICO_IMPORTADOR']),
+        ),
+        'eliminar_acentos': (
+            lambda: datos['CODCOMUN'].str.strip().str.lower().apply(eliminar_acentos),
+            lambda: normalizar_texto_serie(datos['CODCOMUN']),
+        ),
+    }
+
+    resultados = []
+    for nombre, (por_fila, por_unicos) in casos.items():
+        t_fila, esperado = medir(por_fila)
+        t_unicos, obtenido = medir(por_unicos)
+        resultados.append({
+            'caso': nombre,
+            'filas': args.filas,
+            'apply_s': round(t_fila, 4),
+            'unicos_s': round(t_unicos, 4),
+            'aceleracion': round(t_fila / t_unicos, 1) if t_unicos else None,
+            'iguales': bool(esperado.astype(object).equals(obtenido.astype(object))),
+        })
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False))
+        return
+    for r in resultados:
+        print(f"{r['caso']:<18} apply {r['apply_s']:>8.3f}s  únicos {r['unicos_s']:>8.3f}s  "
+              f"x{r['aceleracion']}  iguales={r['iguales']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Prueba de carga del modo multi-worker: levanta `gunicorn wsgi:server` con
+distintas cantidades de workers y mide cuántas actualizaciones de un panel
+por segundo atiende con varios clientes concurrentes. Todos los workers
+leen el mismo dataset, registrado una vez en cache/datasets (Arrow).
+
+El caché de paneles se desactiva en los workers (FIGURAS_MAX_BYTES=0) y cada
+request usa un rango de fechas distinto, para medir el cálculo del panel y
+no aciertos de caché.
+
+Uso: python benchmarks/bench_workers.py [--workers 1 2 4] [--filas 1000000] [--clientes 16]
+                                        [--requests 200] [--panel series] [--puerto 8060] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(RAIZ)
+
+import pandas as pd  # noqa: E402
+
+from generar_din import generar_din  # noqa: E402
+from utils.almacen_datasets import ARROW_DISPONIBLE, liberar_dataset, registrar_dataset  # noqa: E402
+from utils.trabajos import procesar_archivo  # noqa: E402
+
+
+def preparar_dataset(filas, carpeta_datos):
+    ruta = os.path.join(carpeta_datos, f'din_{filas}.txt')
+    if not os.path.exists(ruta):
+        generar_din(filas, ruta)
+    _, df = procesar_archivo(ruta)
+    # Queda escrito en cache/datasets: los workers de gunicorn lo mapean desde ahí
+    return registrar_dataset(df), df['DD'].min(), df['DD'].max()
+
+
+def cuerpo_panel(panel, handle, inicio, fin):
+    # Mismo payload que manda el navegador al callback del panel (ver registrar_panel)
+    valores = [
+        ('tabs-visualizaciones', 'value', panel),
+        ('stored-data', 'data', handle),
+        ('date-picker-range', 'start_date', inicio),
+        ('date-picker-range', 'end_date', fin),
+        ('search-producto', 'value', None),
+        ('search-importador', 'value', None),
+        ('search-pa-orig', 'value', None),
+        ('search-pa-adq', 'value', None),
+        ('search-comuna', 'value', None),
+        ('section-dropdown', 'value', None),
+        ('hsdesc-dropdown', 'value', None),
+        ('column-dropdown', 'value', 'NUM_UNICO_IMPORTADOR'),
+    ]
+    return json.dumps({
+        'output': f'..panel-{panel}.children...firma-{panel}.data..',
+        'outputs': [{'id': f'panel-{panel}', 'property': 'children'}, {'id': f'firma-{panel}', 'property': 'data'}],
+        'inputs': [{'id': id_, 'property': prop, 'value': valor} for id_, prop, valor in valores],
+        'changedPropIds': ['date-picker-range.start_date'],
+        'state': [{'id': f'firma-{panel}', 'property': 'data', 'value': None}],
+    }).encode('utf-8')
+
+
+def cuerpos(panel, handle, min_date, max_date, cantidad):
+    # Rangos de fechas distintos: cada request recalcula el panel. El inicio recorre la
+    # primera mitad del período y, tras cada vuelta, el fin retrocede un día: no se
+    # repite un rango antes de mitad² requests
+    mitad = max((max_date - min_date).days // 2, 1)
+    resultado = []
+    for i in range(cantidad):
+        inicio = min_date + pd.Timedelta(days=i % mitad)
+        fin = max_date - pd.Timedelta(days=(i // mitad) % mitad)
+        resultado.append(cuerpo_panel(panel, handle, inicio.strftime('%Y-%m-%d'), fin.strftime('%Y-%m-%d')))
+    return resultado
+
+
+def enviar(url, cuerpo):
+    peticion = urllib.request.Request(url, data=cuerpo, headers={'Content-Type': 'application/json'})
+    inicio = time.perf_counter()
+    with urllib.request.urlopen(peticion, timeout=600) as respuesta:
+        respuesta.read()
+        if respuesta.status != 200:
+            raise RuntimeError(f"Respuesta {respuesta.status}")
+    return time.perf_counter() - inicio
+
+
+def esperar_servidor(puerto, proceso, espera_maxima=120):
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < espera_maxima:
+        if proceso.poll() is not None:
+            raise RuntimeError("gunicorn terminó antes de responder (¿está instalado?)")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{puerto}/', timeout=1) as respuesta:
+                if respuesta.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.1)
+    raise TimeoutError(f"El servidor no respondió en {espera_maxima}s")
+
+
+def medir_workers(workers, puerto, lote, clientes):
+    entorno = dict(os.environ, FIGURAS_MAX_BYTES='0')
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'wsgi:server', '--workers', str(workers),
+         '--bind', f'127.0.0.1:{puerto}', '--timeout', '600'],
+        cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{puerto}/_dash-update-component'
+    try:
+        esperar_servidor(puerto, proceso)
+        with ThreadPoolExecutor(max_workers=clientes) as pool:
+            # Calentamiento: cada worker mapea el dataset y arma sus índices
+            list(pool.map(lambda cuerpo: enviar(url, cuerpo), lote[:max(clientes, workers * 2)]))
+            inicio = time.perf_counter()
+            latencias = list(pool.map(lambda cuerpo: enviar(url, cuerpo), lote))
+            duracion = time.perf_counter() - inicio
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+    latencias.sort()
+    return {
+        'workers': workers,
+        'requests': len(lote),
+        'requests_por_s': round(len(lote) / duracion, 2),
+        'latencia_p50_s': round(latencias[len(latencias) // 2], 4),
+        'latencia_p95_s': round(latencias[int(len(latencias) * 0.95) - 1], 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--clientes', type=int, default=16, help='Requests concurrentes')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--panel', default='series')
+    parser.add_argument('--puerto', type=int, default=8060)
+    parser.add_argument('--datos', default=os.path.join('benchmarks', 'datos'))
+    parser.add_argument('--json', action='store_true', help='Imprime los resultados como JSON')
+    args = parser.parse_args()
+
+    if not ARROW_DISPONIBLE:
+        sys.exit("Se necesita PyArrow: los workers comparten el dataset por su archivo Arrow")
+
+    os.makedirs(args.datos, exist_ok=True)
+    handle, min_date, max_date = preparar_dataset(args.filas, args.datos)
+    try:
+        lote = cuerpos(args.panel, handle, min_date, max_date, args.requests)
+        resultados = [medir_workers(w, args.puerto, lote, args.clientes) for w in args.workers]
+    finally:
+        liberar_dataset(handle['dataset_id'])
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False))
+        return
+    base = resultados[0]['requests_por_s']
+    print(f"— panel {args.panel}, {args.filas:,} filas, {args.clientes} clientes")
+    for r in resultados:
+        print(f"   {r['workers']:>2} workers  {r['requests_por_s']:>8.2f} req/s  (x{r['requests_por_s'] / base:.2f})  "
+              f"p50 {r['latencia_p50_s']:.3f}s  p95 {r['latencia_p95_s']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
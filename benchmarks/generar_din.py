@@ -0,0 +1,149 @@
+"""
+Genera un TXT del DIN sintético con el layout de la estructura (todas las
+columnas, sin encabezado, ';' y coma decimal, latin1). Los códigos salen de
+las hojas de DICCIONARIO.xlsx con una distribución sesgada (Zipf), como en
+los archivos reales: pocos países, puertos y aranceles concentran casi todo.
+
+Uso: python benchmarks/generar_din.py --filas 1000000 [--salida din_1000000.txt] [--semilla 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+from utils.diccionarios import obtener_categoria_hs, obtener_glosas  # noqa: E402
+from utils.helpers import COMUNAS_PATH, IMPORTADORES_PATH, MAPEO_HOJAS, obtener_comunas, obtener_import_dict  # noqa: E402
+from utils.ingesta import leer_estructura  # noqa: E402
+
+# Filas por bloque al escribir, para generar 10M sin tener todo en memoria
+FILAS_POR_BLOQUE = 500_000
+
+PALABRAS = [
+    'ACEITE', 'TORNILLO', 'CABLE', 'POLIETILENO', 'NEUMATICO', 'CELULAR', 'MANZANA', 'CEMENTO', 'PAPEL',
+    'ACERO', 'BOMBA', 'MOTOR', 'FILTRO', 'VALVULA', 'TELA', 'ZAPATILLA', 'VINO', 'HARINA', 'RESINA', 'VIDRIO',
+]
+MARCAS = ['SIN MARCA', 'ACME', 'GENERICA', 'SAMSUNG', 'BOSCH', 'NESTLE', 'SHELL', 'BAYER', 'LG', '3M']
+
+
+def pesos_zipf(n, exponente=1.1):
+    p = 1 / np.arange(1, n + 1) ** exponente
+    return p / p.sum()
+
+
+def _elegir(rng, valores, filas):
+    valores = np.asarray(valores)
+    return valores[rng.choice(len(valores), size=filas, p=pesos_zipf(len(valores)))]
+
+
+def _codigos_hoja(hoja):
+    codigos = pd.to_numeric(pd.Series(obtener_glosas(hoja).index), errors='coerce').dropna()
+    return codigos.astype(np.int64).unique()
+
+
+def _aranceles(rng, cantidad=8_000):
+    # Códigos de 8 dígitos cuyo capítulo existe en CATEGORIA_HS
+    capitulos = pd.to_numeric(obtener_categoria_hs()['Chapter'], errors='coerce').dropna().astype(int).unique()
+    capitulos = capitulos[(capitulos >= 1) & (capitulos <= 99)]
+    resto = rng.integers(0, 1_000_000, size=cantidad)
+    return np.char.zfill((rng.choice(capitulos, size=cantidad) * 1_000_000 + resto).astype(str), 8)
+
+
+def _fechas(rng, filas, anio):
+    dias = rng.integers(0, 365, size=filas)
+    fechas = pd.Timestamp(f'{anio}-01-01') + pd.to_timedelta(dias, unit='D')
+    return fechas.strftime('%d%m%Y').to_numpy()
+
+
+def _ruts(rng, cantidad=2_000):
+    # En un checkout sin Git LFS import.txt es solo el puntero y no se puede leer
+    try:
+        ruts = list(obtener_import_dict().keys())
+    except Exception as e:
+        print(f"⚠️ No se pudo leer {IMPORTADORES_PATH} ({e}), se usan RUT sintéticos")
+        ruts = []
+    if ruts:
+        return np.array(ruts)
+    return np.unique(rng.integers(1_000_000, 99_999_999, size=cantidad)).astype(str)
+
+
+def _nombres_comunas():
+    try:
+        comunas = obtener_comunas()
+    except Exception:
+        # Los datos de referencia se cargan juntos: si falla import.txt se lee comunas.csv solo
+        comunas = pd.read_csv(COMUNAS_PATH)
+    return comunas['nombre'].str.upper().to_numpy()
+
+
+def preparar_universo(rng):
+    """Valores posibles de cada columna con código (una vez por archivo)."""
+    universo = {hoja: _codigos_hoja(hoja) for hoja in set(MAPEO_HOJAS.values())}
+    universo['ARANC_NAC'] = _aranceles(rng)
+    universo['NUM_UNICO_IMPORTADOR'] = _ruts(rng)
+    universo['COMUNA_NOMBRE'] = _nombres_comunas()
+    return universo
+
+
+def generar_bloque(rng, filas, estructura, universo, anio=2024):
+    columnas = {}
+    for fila in estructura.itertuples(index=False):
+        nombre, tipo = fila.nombre, fila.tipo
+        largo = int(fila.largo) if pd.notna(fila.largo) else 8
+        if nombre in MAPEO_HOJAS and len(universo[MAPEO_HOJAS[nombre]]):
+            columnas[nombre] = _elegir(rng, universo[MAPEO_HOJAS[nombre]], filas)
+        elif nombre in ('ARANC_NAC', 'NUM_UNICO_IMPORTADOR'):
+            columnas[nombre] = _elegir(rng, universo[nombre], filas)
+        elif nombre == 'CIF_ITEM':
+            columnas[nombre] = np.round(rng.lognormal(8, 2, size=filas), 2)
+        elif nombre == 'CANT_MERC':
+            columnas[nombre] = np.round(rng.lognormal(6, 2, size=filas), 4)
+        elif nombre == 'MEDIDA':
+            columnas[nombre] = np.where(rng.random(filas) < 0.9, 6, rng.integers(1, 20, size=filas))
+        elif nombre == 'DNOMBRE':
+            columnas[nombre] = _elegir(rng, PALABRAS, filas)
+        elif nombre == 'DMARCA':
+            columnas[nombre] = _elegir(rng, MARCAS, filas)
+        elif tipo == 'DATE':
+            columnas[nombre] = _fechas(rng, filas, anio)
+        elif tipo == 'NUMBER':
+            maximo = 10 ** min(largo - int(fila.precision), 6)
+            columnas[nombre] = rng.integers(0, maximo, size=filas)
+        else:
+            # Texto libre: en el DIN real la mayoría viene vacío
+            columnas[nombre] = np.where(rng.random(filas) < 0.7, '', _elegir(rng, PALABRAS, filas))
+    return pd.DataFrame(columnas, columns=estructura['nombre'])
+
+
+def generar_din(filas, ruta, semilla=0, anio=2024):
+    """Escribe `filas` filas sintéticas en `ruta` y retorna la ruta."""
+    rng = np.random.default_rng(semilla)
+    estructura = leer_estructura()
+    universo = preparar_universo(rng)
+
+    inicio = time.perf_counter()
+    with open(ruta, 'w', encoding='latin1', newline='') as archivo:
+        for desde in range(0, filas, FILAS_POR_BLOQUE):
+            bloque = generar_bloque(rng, min(FILAS_POR_BLOQUE, filas - desde), estructura, universo, anio)
+            bloque.to_csv(archivo, sep=';', decimal=',', header=False, index=False, lineterminator='\n')
+    print(f"🧪 {filas:,} filas sintéticas en {ruta} ({time.perf_counter() - inicio:.1f}s)")
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--salida', default=None)
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+    generar_din(args.filas, args.salida or f'din_{args.filas}.txt', args.semilla)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 from dash import html, dcc
 import dash_uploader as du
 import os
+import uuid
+from paneles import PESTANAS
 
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
@@ -11,39 +13,46 @@ def create_layout(app):
         html.H2("Dashboard de Importaciones", className="my-header"),
         du.Upload(
             id='dash-uploader',
-            text='Arrastra o selecciona tu archivo CSV o TXT de importaciones',
-            max_files=1,
+            text='Arrastra o selecciona tus archivos CSV o TXT de importaciones (uno o más períodos)',
+            max_files=12,
             filetypes=['csv', 'txt'],
-            upload_id='auto',
+            # Una carpeta de uploads (y una sesión) por cada carga de la página
+            upload_id=uuid.uuid4().hex,
         ),
         dcc.Store(id='stored-data'),
+        # Trabajo de ingesta en segundo plano: el intervalo consulta su etapa hasta que termina
+        dcc.Store(id='trabajo-upload'),
+        dcc.Interval(id='intervalo-trabajo', interval=1000, disabled=True),
+        html.Div(id='estado-upload', style={'margin': '10px 0'}),
         html.Div([
             html.Label("Filtrar por rango de fechas:"),
             dcc.DatePickerRange(
                 id='date-picker-range',
-                display_format='YYYY-MM-DD'
+                display_format='YYYY-MM-DD',
+                disabled=True
             ),
             html.Br(),
             html.Label("Buscar por nombre en PRODUCTO:"),
-            dcc.Input(id='search-producto', type='text', placeholder='Términos separados por coma'),
+            dcc.Input(id='search-producto', type='text', placeholder='Términos separados por coma', disabled=True),
             html.Br(),
             html.Label("Buscar por importador:"),
-            dcc.Input(id='search-importador', type='text', placeholder='Términos separados por coma'),
+            dcc.Input(id='search-importador', type='text', placeholder='Términos separados por coma', disabled=True),
             html.Br(),
             html.Label("Buscar por país de origen:"),
-            dcc.Input(id='search-pa-orig', type='text', placeholder='Términos separados por coma'),
+            dcc.Input(id='search-pa-orig', type='text', placeholder='Términos separados por coma', disabled=True),
             html.Br(),
             html.Label("Buscar por país de adquisición:"),
-            dcc.Input(id='search-pa-adq', type='text', placeholder='Términos separados por coma'),
+            dcc.Input(id='search-pa-adq', type='text', placeholder='Términos separados por coma', disabled=True),
             html.Br(),
             html.Label("Buscar por comuna:"),
-            dcc.Input(id='search-comuna', type='text', placeholder='Términos separados por coma'),
+            dcc.Input(id='search-comuna', type='text', placeholder='Términos separados por coma', disabled=True),
             html.Br(),
             html.Label("Selecciona columna para graficar:"),
             dcc.Dropdown(
                 id='column-dropdown',
                 options=[{'label': col, 'value': col} for col in ['NUM_UNICO_IMPORTADOR','PA_ORIG', 'PA_ADQ', 'TPO_CARGA', 'VIA_TRAN', 'TPO_BUL1', 'TPO_BUL2']],
-                value='NUM_UNICO_IMPORTADOR'
+                value='NUM_UNICO_IMPORTADOR',
+                disabled=True
             )
         ], id='filters-container', style={'backgroundColor': '#23272b', 'padding': '20px', 'borderRadius': '10px', 'margin-bottom': '30px'}),
         html.Div([
@@ -64,5 +73,17 @@ def create_layout(app):
                 placeholder="Selecciona una o varias descripciones HS"
             )
         ], style={'backgroundColor': '#23272b', 'padding': '20px', 'borderRadius': '10px', 'margin-bottom': '30px'}),
-        html.Div(id='output-visualizations')
+        html.Div([
+            dcc.Tabs(
+                id='tabs-visualizaciones',
+                value='kpis',
+                children=[
+                    dcc.Tab(label=etiqueta, value=valor, children=[
+                        dcc.Loading(html.Div(id=f'panel-{valor}')),
+                        dcc.Store(id=f'firma-{valor}'),
+                    ])
+                    for valor, etiqueta in PESTANAS
+                ]
+            )
+        ], id='output-visualizations')
     ], style={'padding': '40px', 'backgroundColor': '#18191a', 'minHeight': '100vh'})
\ No newline at end of file
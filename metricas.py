@@ -0,0 +1,57 @@
+from flask import Blueprint, g, jsonify, request
+import json
+import logging
+import os
+import time
+import uuid
+
+from utils.almacen_datasets import estado_almacen
+from utils.cache_figuras import cache_figuras
+from utils.instrumentacion import iniciar_captura, resumen_metricas, terminar_captura
+
+bp = Blueprint('metricas', __name__)
+
+# Traza por request: siempre con METRICAS_TRAZAS=1, o solo en los requests que traen el header X-Traza
+TRAZAS_SIEMPRE = os.environ.get('METRICAS_TRAZAS', '0') == '1'
+CARPETA_TRAZAS = os.path.join(os.getcwd(), 'cache', 'trazas')
+
+
+@bp.route('/metrics', methods=['GET'])
+def metricas():
+    """Totales por etapa del pipeline, estado del almacén de datasets y del caché de paneles."""
+    return jsonify({
+        'pid': os.getpid(),
+        **resumen_metricas(),
+        'almacen': estado_almacen(),
+        'cache_figuras': cache_figuras.estadisticas(),
+    })
+
+
+@bp.before_app_request
+def iniciar_traza():
+    if TRAZAS_SIEMPRE or request.headers.get('X-Traza'):
+        g.traza = iniciar_captura()
+        g.traza_inicio = time.perf_counter()
+
+
+@bp.teardown_app_request
+def guardar_traza(error=None):
+    mediciones = g.pop('traza', None)
+    if mediciones is None:
+        return
+    terminar_captura(mediciones)
+    if not mediciones:
+        return
+    traza = {
+        'ruta': request.path,
+        'metodo': request.method,
+        'wall_s': time.perf_counter() - g.pop('traza_inicio'),
+        'etapas': mediciones,
+    }
+    try:
+        os.makedirs(CARPETA_TRAZAS, exist_ok=True)
+        ruta = os.path.join(CARPETA_TRAZAS, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.json")
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(traza, archivo, ensure_ascii=False, indent=2)
+    except OSError as e:
+        logging.warning(f"No se pudo guardar la traza: {e}")
@@ -0,0 +1,405 @@
+from dash import dash_table, dcc, html
+import pandas as pd
+import numpy as np
+from utils.explorador import COLUMNAS_EXPLORADOR, FILAS_POR_PAGINA
+from utils.helpers import ids_comunas, normalizar_texto_serie, obtener_comunas, obtener_puertos
+from utils.instrumentacion import medir_etapa
+from utils.rankings import top_productos_por_cif, top_productos_por_conteo
+from utils.rutas import figura_rutas
+
+
+# Pestañas del dashboard: (valor, etiqueta). Cada una tiene su propio callback
+PESTANAS = [
+    ('kpis', 'Indicadores'),
+    ('series', 'Series de tiempo'),
+    ('rankings', 'Rankings'),
+    ('heatmaps', 'Heatmaps'),
+    ('mapas', 'Mapas'),
+    ('tablas', 'Tablas'),
+]
+
+
+def crear_tabla(df, **opciones):
+    return dash_table.DataTable(
+        data=df.to_dict('records'),
+        columns=[{'name': i, 'id': i} for i in df.columns],
+        style_header={
+            'backgroundColor': '#23272b',
+            'color': '#00cec9',
+            'fontWeight': 'bold',
+            'border': '1px solid #444'
+        },
+        style_table={
+            'overflowX': 'auto',  # Scroll horizontal si es necesario
+            'maxWidth': '100vw',  # No se sale de la ventana
+            'minWidth': '100%',       # Ocupa todo el ancho disponible
+        },
+        style_cell={
+            'minWidth': '120px', 'width': '120px', 'maxWidth': '300px',
+            'whiteSpace': 'normal',  # Permite salto de línea en celdas
+            'backgroundColor': '#18191a',
+            'color': '#f5f6fa',
+            'border': '1px solid #444',
+            'fontFamily': 'Segoe UI, Arial, sans-serif',
+            'fontSize': '16px'
+        },
+        style_data={
+            'backgroundColor': '#23272b',
+            'color': '#f5f6fa'
+        },
+        **opciones
+    )
+
+
+def crear_explorador():
+    # Las filas las manda el callback del explorador, una página a la vez
+    return crear_tabla(
+        pd.DataFrame(columns=COLUMNAS_EXPLORADOR),
+        id='explorador-transacciones',
+        page_action='custom',
+        sort_action='custom',
+        filter_action='custom',
+        page_current=0,
+        page_size=FILAS_POR_PAGINA,
+        sort_by=[{'column_id': 'CIF_ITEM', 'direction': 'desc'}],
+        filter_query='',
+    )
+
+
+def _fuente_mensual(df, contexto):
+    # Series mensuales y heatmaps: desde el cubo si los filtros activos son dimensiones del cubo.
+    # Si el callback ya lo respondió con el cubo, `df` es None y no se tocaron las filas
+    fuente = contexto.get('fuente')
+    if fuente is None:
+        fuente = contexto['cubo'].responder(contexto['filtros'])
+    if fuente is None:
+        fuente = df.assign(
+            MES=df['DD'].dt.to_period('M'),
+            CANT_MERC=pd.to_numeric(df['CANT_MERC'], errors='coerce')
+        )
+    return fuente
+
+
+def panel_kpis(df, contexto):
+    # Indicadores principales
+    unidades = df['MEDIDA'].unique()
+    cant_merc = pd.to_numeric(df['CANT_MERC'], errors='coerce')
+    mes = df['DD'].dt.to_period('M')
+
+    if len(unidades) == 1 and not pd.isna(unidades[0]) and unidades[0] == 6:
+        total_kg = cant_merc.sum()
+        total_cif = df['CIF_ITEM'].sum()
+        precio_por_kg = total_cif / total_kg if total_kg else 0
+        promedio_cif_mensual = df['CIF_ITEM'].groupby(mes).sum().mean()
+        promedio_kg_mensual = cant_merc.groupby(mes).sum().mean()
+
+        return [
+            html.Div([
+                html.Div([
+                    html.H4("Total Kg"),
+                    html.H5(f"{total_kg:,.0f} Kg 🏋️")
+                ], style={'width': '30%', 'display': 'inline-block', 'textAlign': 'center'}),
+                html.Div([
+                    html.H4("Total CIF"),
+                    html.H5(f"{total_cif:,.0f} 💰")
+                ], style={'width': '30%', 'display': 'inline-block', 'textAlign': 'center'}),
+                html.Div([
+                    html.H4("Precio por Kg"),
+                    html.H5(f"{precio_por_kg:,.2f} 💸")
+                ], style={'width': '30%', 'display': 'inline-block', 'textAlign': 'center'}),
+            ], style={'display': 'flex', 'justifyContent': 'space-around'}),
+            html.H4("Indicadores adicionales"),
+            html.P(f"CIF Total Promedio Mensual: {promedio_cif_mensual:,.2f} 📈"),
+            html.P(f"Total de Kg Promedio Mensual: {promedio_kg_mensual:,.2f} Kg 📅")
+        ]
+
+    total_cif = df['CIF_ITEM'].sum()
+    promedio_cif = df['CIF_ITEM'].mean()
+    promedio_kg_mensual = cant_merc.groupby(mes).sum().mean()
+
+    return [
+        html.Div([
+            html.H4("Total CIF"),
+            html.H5(f"{total_cif:,.0f} 💰")
+        ], style={'width': '30%', 'display': 'inline-block', 'textAlign': 'center'}),
+        html.H4("Indicadores adicionales"),
+        html.P(f"CIF Total Promedio: {promedio_cif:,.2f} 📈"),
+        html.P(f"Total de Kg Promedio Mensual: {promedio_kg_mensual:,.2f} Kg 📅")
+    ]
+
+
+def panel_series(df, contexto):
+    import plotly.express as px  # diferido: pesa en el arranque y solo lo usan los paneles con gráficos
+    fuente = _fuente_mensual(df, contexto)
+    monthly_group = fuente.groupby('MES')['CIF_ITEM'].sum().reset_index()
+    monthly_group['CANT_MERC'] = fuente.groupby('MES')['CANT_MERC'].sum().reset_index(drop=True)
+    monthly_group['MES'] = monthly_group['MES'].dt.to_timestamp() + pd.offsets.MonthEnd(0)
+    monthly_group['CIF_ITEM/KILOS'] = monthly_group['CIF_ITEM'] / monthly_group['CANT_MERC']
+    monthly_group_country_ADQ = (
+        fuente.groupby(['MES', 'PA_ADQ'], observed=True)['CIF_ITEM']  # Agrupa por mes y país
+        .sum()
+        .reset_index()
+    )
+    monthly_group_country_ADQ['MES'] = monthly_group_country_ADQ['MES'].dt.to_timestamp() + pd.offsets.MonthEnd(0)
+
+    monthly_group_country_ORG = (
+        fuente.groupby(['MES', 'PA_ORIG'], observed=True)['CIF_ITEM']  # Agrupa por mes y país
+        .sum()
+        .reset_index()
+    )
+    monthly_group_country_ORG['MES'] = monthly_group_country_ORG['MES'].dt.to_timestamp() + pd.offsets.MonthEnd(0)
+
+    fig_monthly = px.area(
+        monthly_group, x='MES', y='CIF_ITEM',
+        title='CIF_ITEM Mensual vs Tiempo',
+        labels={'MES': 'Mes', 'CIF_ITEM': 'CIF_ITEM'},
+        template='plotly_dark'
+    )
+    fig_monthly_kilos = px.area(
+        monthly_group, x='MES', y='CANT_MERC',
+        title='CANT_MERC Mensual vs Tiempo',
+        labels={'MES': 'Mes', 'CANT_MERC': 'Kilos'},
+        template='plotly_dark'
+    )
+    fig_monthly_kilos_cif = px.line(
+        monthly_group, x='MES', y='CIF_ITEM/KILOS',
+        title='CIF_ITEM/KILOS Mensual vs Tiempo',
+        labels={'MES': 'Mes', 'CIF_ITEM/KILOS': 'CIF_ITEM/Kilos'},
+        template='plotly_dark'
+    )
+    fig_monthly_group_country_ADQ = px.line(
+        monthly_group_country_ADQ,
+        x='MES',
+        y='CIF_ITEM',
+        color='PA_ADQ',
+        title='Suma mensual de CIF_ITEM por país de adquisición',
+        labels={'MES': 'Mes', 'CIF_ITEM': 'Suma CIF_ITEM', 'PA_ADQ': 'País'},
+        template='plotly_dark'
+    )
+    fig_monthly_group_country_ORG = px.line(
+        monthly_group_country_ORG,
+        x='MES',
+        y='CIF_ITEM',
+        color='PA_ORIG',
+        title='Suma mensual de CIF_ITEM por país de origen',
+        labels={'MES': 'Mes', 'CIF_ITEM': 'Suma CIF_ITEM', 'PA_ORIG': 'País'},
+        template='plotly_dark'
+    )
+
+    return [
+        dcc.Graph(figure=fig_monthly),
+        dcc.Graph(figure=fig_monthly_kilos),
+        dcc.Graph(figure=fig_monthly_kilos_cif),
+        dcc.Graph(figure=fig_monthly_group_country_ADQ),
+        dcc.Graph(figure=fig_monthly_group_country_ORG),
+    ]
+
+
+def panel_rankings(df, contexto):
+    import plotly.express as px
+    column_dropdown = contexto['columna']
+
+    # Gráfico de porcentaje por columna seleccionada
+    group = df.groupby(column_dropdown, observed=True)['CIF_ITEM'].sum()
+    percentage = (group / group.sum()) * 100
+    percentage = percentage.sort_values(ascending=False)
+    fig = px.bar(
+        percentage,
+        x=percentage.index,
+        y=percentage.values,
+        title=f'Porcentaje de CIF_ITEM por {column_dropdown}',
+        labels={'x': column_dropdown, 'y': 'Porcentaje de CIF_ITEM'},
+        template='plotly_dark'
+    )
+    fig.update_layout(xaxis_tickangle=-45)
+
+    # Gráfico de porcentaje por tipo de producto (Section)
+    fig_section = None
+    if 'Section' in df.columns:
+        group_section = df.groupby('Section', observed=True)['CIF_ITEM'].sum()
+        percentage_section = (group_section / group_section.sum()) * 100
+        percentage_section = percentage_section.sort_values(ascending=False)
+        fig_section = px.pie(
+            percentage_section,
+            values=percentage_section.values,
+            names=percentage_section.index,
+            title='Porcentaje del Tipo de Producto (Section)',
+            labels={'value': 'Porcentaje', 'index': 'Tipo de Producto'},
+            template='plotly_dark'
+        )
+
+    # Top 20 productos: conteo por id de producto y selección parcial, sin ordenar todo
+    with medir_etapa('ranking:conteo', filas=len(df)):
+        top20_df = top_productos_por_conteo(df, 20)
+
+    # Top 20 transacciones por producto
+    with medir_etapa('ranking:cif', filas=len(df)):
+        top20_trans_df = top_productos_por_cif(df, 20)
+    top20_trans_df['Fecha'] = top20_trans_df['Fecha'].dt.strftime('%Y-%m-%d')
+
+    return [
+        html.H3("Gráficos principales"),
+        dcc.Graph(figure=fig),
+        dcc.Graph(figure=fig_section) if fig_section else None,
+        html.H3("TOP 20 Productos con mayor frecuencia de compra"),
+        crear_tabla(top20_df),
+        html.H3("TOP 20 Productos frecuentes with mayor valor de transacción por producto (última fecha)"),
+        crear_tabla(top20_trans_df),
+    ]
+
+
+def panel_heatmaps(df, contexto):
+    import plotly.express as px
+    fuente = _fuente_mensual(df, contexto)
+    fuente_heatmap = fuente.assign(MES=fuente['MES'].dt.to_timestamp())
+
+    # Heatmap país de origen vs tiempo
+    heatmap_data_origen = fuente_heatmap.pivot_table(index='PA_ORIG', columns='MES', values='CIF_ITEM', aggfunc='sum', fill_value=0, observed=True)
+    fig_heatmap_origen = px.imshow(
+        heatmap_data_origen,
+        title='Heatmap de País de Origen vs Tiempo',
+        labels={'color': 'CIF_ITEM'},
+        template='plotly_dark'
+    )
+
+    # Heatmap país de adquisición vs tiempo
+    heatmap_data_adq = fuente_heatmap.pivot_table(index='PA_ADQ', columns='MES', values='CIF_ITEM', aggfunc='sum', fill_value=0, observed=True)
+    fig_heatmap_adq = px.imshow(
+        heatmap_data_adq,
+        title='Heatmap de País de Adquisición vs Tiempo',
+        labels={'color': 'CIF_ITEM'},
+        template='plotly_dark'
+    )
+
+    return [
+        html.H3("Heatmap de País de Origen en el Tiempo"),
+        dcc.Graph(figure=fig_heatmap_origen),
+        html.H3("Heatmap de País de Adquisición en el Tiempo"),
+        dcc.Graph(figure=fig_heatmap_adq),
+    ]
+
+
+def estadisticas_comunas(df):
+    # Estadísticas por comuna: se agrupa por el valor original y recién después se
+    # normaliza el nombre de cada grupo (unas 350 filas, no una por transacción)
+    agregados = {'CIF_ITEM': 'sum', 'CANT_MERC': 'sum', 'NUM_UNICO_IMPORTADOR': 'count'}
+    por_valor = df.groupby('CODCOMUN', observed=True).agg(agregados).reset_index()
+    comunas_stats = por_valor.assign(CODCOMUN=normalizar_texto_serie(por_valor['CODCOMUN'])).groupby('CODCOMUN').sum().reset_index()
+    comunas_stats.columns = ['Comuna', 'Total CIF_ITEM', 'Total Mercancías', 'Número de Transacciones']
+    return comunas_stats
+
+
+def comunas_en_mapa(df):
+    """
+    Un punto por comuna de comunas.csv con sus totales. Las filas ya traen
+    COMUNA_ID desde la ingesta; si hay datos guardados antes de eso se resuelve acá.
+    """
+    if 'COMUNA_ID' in df.columns and not df['COMUNA_ID'].isna().any():
+        ids = df['COMUNA_ID']
+    else:
+        ids = ids_comunas(df['CODCOMUN'])
+    comunas_stats = df.groupby(ids.to_numpy()).agg({
+        'CIF_ITEM': 'sum',
+        'CANT_MERC': 'sum',
+        'NUM_UNICO_IMPORTADOR': 'count'
+    })
+    comunas_stats = comunas_stats[comunas_stats.index >= 0]
+    comunas_stats.columns = ['Total CIF_ITEM', 'Total Mercancías', 'Número de Transacciones']
+    coordenadas = obtener_comunas().set_index('comuna_id')[['nombre', 'latitud', 'longitud']]
+    coordenadas.columns = ['Comuna', 'Latitud', 'Longitud']
+    return coordenadas.join(comunas_stats, how='inner').dropna(subset=['Latitud', 'Longitud']).reset_index(drop=True)
+
+
+def panel_mapas(df, contexto):
+    import plotly.express as px
+    # Un marcador por comuna con sus totales, no uno por transacción
+    with medir_etapa('mapa:comunas', filas=len(df)):
+        select_df_comunas = comunas_en_mapa(df)
+
+    # Mapa interactivo
+    fig_comunas = px.scatter_mapbox(
+        select_df_comunas,
+        lat='Latitud',
+        lon='Longitud',
+        hover_name='Comuna',
+        hover_data={
+            'Total CIF_ITEM': True,
+            'Total Mercancías': True,
+            'Número de Transacciones': True
+        },
+        color='Comuna',
+        size='Total CIF_ITEM',
+        title="Mapa de Comuna del Importador con Estadísticas",
+        zoom=4,
+        height=800,
+        template='plotly_dark'
+    )
+    fig_comunas.update_layout(mapbox_style="carto-positron")
+
+    # Estadísticas por ruta y coordenadas de cada puerto
+    puertos_stats = df.groupby(['PTO_EMB', 'PTO_DESEM'], observed=True).agg({
+        'CIF_ITEM': 'sum',
+        'CANT_MERC': 'sum',
+        'NUM_UNICO_IMPORTADOR': 'count'
+    }).reset_index()
+    puertos_stats.columns = ['Puerto de Embarque', 'Puerto de Desembarque', 'Total CIF_ITEM', 'Total Mercancías', 'Número de Transacciones']
+    puertos_coords = obtener_puertos()
+    puertos_stats = puertos_stats.merge(puertos_coords, left_on='Puerto de Embarque', right_on='Puerto', how='left')
+    puertos_stats = puertos_stats.merge(puertos_coords, left_on='Puerto de Desembarque', right_on='Puerto', how='left', suffixes=('_emb', '_desem'))
+    puertos_stats['Latitud_emb'] = pd.to_numeric(puertos_stats['Latitud_emb'], errors='coerce')
+    puertos_stats['Longitud_emb'] = pd.to_numeric(puertos_stats['Longitud_emb'], errors='coerce')
+    puertos_stats['Latitud_desem'] = pd.to_numeric(puertos_stats['Latitud_desem'], errors='coerce')
+    puertos_stats['Longitud_desem'] = pd.to_numeric(puertos_stats['Longitud_desem'], errors='coerce')
+    puertos_stats = puertos_stats.dropna(subset=['Latitud_emb', 'Longitud_emb', 'Latitud_desem', 'Longitud_desem'])
+
+    fig_puertos = figura_rutas(puertos_stats)
+
+    return [
+        html.H3("Mapa de Comunas con Estadísticas"),
+        dcc.Graph(figure=fig_comunas),
+        html.H3("Mapa de Movimiento entre Puertos"),
+        dcc.Graph(figure=fig_puertos),
+    ]
+
+
+def _precio_promedio(df, columna):
+    precio_df = df.groupby(columna, observed=True).agg({
+        'CIF_ITEM': 'sum',
+        'CANT_MERC': 'sum'
+    }).reset_index()
+    precio_df['CANT_MERC'] = precio_df['CANT_MERC'].replace(0, np.nan)
+    precio_df['Precio Promedio (CIF/Kg)'] = precio_df['CIF_ITEM'] / precio_df['CANT_MERC']
+    precio_df['Precio Promedio (CIF/Kg)'] = precio_df['Precio Promedio (CIF/Kg)'].round(2)
+    return precio_df[[columna, 'Precio Promedio (CIF/Kg)']]
+
+
+def panel_tablas(df, contexto):
+    # Precio promedio por países de origen y de adquisición
+    df = df.assign(CANT_MERC=pd.to_numeric(df['CANT_MERC'], errors='coerce'))
+    precio_promedio_origen_df = _precio_promedio(df, 'PA_ORIG')
+    precio_promedio_adq_df = _precio_promedio(df, 'PA_ADQ')
+
+    return [
+        html.H3("Explorador de transacciones"),
+        crear_explorador(),
+        html.H3(" Precio Promedio por País de Adquisición"),
+        crear_tabla(precio_promedio_adq_df),
+        html.H3("Precio Promedio por País de Origen"),
+        crear_tabla(precio_promedio_origen_df),
+        html.H3("Estadísticas por Comuna"),
+        crear_tabla(estadisticas_comunas(df)),
+    ]
+
+
+# Paneles que solo usan _fuente_mensual: con filtros que el cubo resuelve no necesitan filas
+PANELES_CUBO = {'series', 'heatmaps'}
+
+# Constructor de cada panel: recibe el DataFrame ya filtrado y el contexto del callback
+PANELES = {
+    'kpis': panel_kpis,
+    'series': panel_series,
+    'rankings': panel_rankings,
+    'heatmaps': panel_heatmaps,
+    'mapas': panel_mapas,
+    'tablas': panel_tablas,
+}
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from utils.explorador import aplicar_filter_query, parsear_filter_query
+
+
+def _df():
+    return pd.DataFrame({
+        'ARANC_NAC': pd.Categorical(['05885000', '12345678', '58850010', '99990000']),
+        'CIF_ITEM': [10.0, 5885.0, 300.0, np.nan],
+        'DD': pd.to_datetime(['2024-01-15', '2024-02-01', '2023-12-31', '2024-01-02']),
+        'DESOBS1': ['nada', None, 'NORMAL', np.nan],
+    })
+
+
+def _filtrar(query):
+    df = _df()
+    return list(aplicar_filter_query(df, np.arange(len(df)), query))
+
+
+def test_contains_con_valor_numerico_conserva_el_texto():
+    assert parsear_filter_query('{ARANC_NAC} scontains 5885') == [('ARANC_NAC', 'contains', '5885')]
+    assert _filtrar('{ARANC_NAC} scontains 5885') == [0, 2]
+    assert _filtrar('{ARANC_NAC} contains 0588') == [0]
+
+
+def test_comparaciones_numericas():
+    assert parsear_filter_query('{CIF_ITEM} >= 300') == [('CIF_ITEM', '>=', 300.0)]
+    assert _filtrar('{CIF_ITEM} >= 300') == [1, 2]
+    assert _filtrar('{CIF_ITEM} = 5885') == [1]
+
+
+def test_datestartswith_y_condiciones_combinadas():
+    assert _filtrar('{DD} datestartswith 2024-01') == [0, 3]
+    assert _filtrar('{DD} datestartswith 2024 && {CIF_ITEM} < 100') == [0]
+
+
+def test_celdas_vacias_no_coinciden_como_texto():
+    assert _filtrar('{DESOBS1} contains nan') == []
+    assert _filtrar('{DESOBS1} contains na') == [0]
+    assert _filtrar('{DESOBS1} datestartswith n') == [0]
+    assert _filtrar('{CIF_ITEM} contains nan') == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.filtros import MotorFiltros
+from utils.indice_busqueda import IndiceBusqueda
+
+
+PRODUCTOS = [
+    'TORNILLO ACERO 5MM', 'tornillo de cobre', 'Tuerca', 'CAFÉ EN GRANO', 'cafe molido',
+    'PERNO M8', '12345', 'ACERO INOXIDABLE', None, 'tubo 3/4', 'Tornillería', '',
+]
+
+
+def _df():
+    filas = len(PRODUCTOS)
+    return pd.DataFrame({
+        'PRODUCTO': PRODUCTOS,
+        'DD': pd.date_range('2024-01-01', periods=filas, freq='7D'),
+        'Section': ['I', 'II', 'III'] * (filas // 3),
+    })
+
+
+def _esperada(df, texto):
+    # Filtrado original del dashboard
+    terminos = [t.strip() for t in texto.split(',')]
+    return df['PRODUCTO'].str.contains('|'.join(terminos), case=False, na=False).to_numpy(dtype=bool)
+
+
+@pytest.mark.parametrize('secuencia', [
+    [r'\d', r'\D'],
+    [r'\w', r'\W', r'\s', r'\S', r'\b', r'\B'],
+    ['t', 'tor', 'tornillo', 'TORNILLO ACERO', 'to'],
+    ['acero', 'ACERO', 'acero, cafe', 'Café', 'caf'],
+    ['torn', r'torn.*o$', 'tornillo', r'^T'],
+])
+def test_mascaras_iguales_a_str_contains(secuencia):
+    df = _df()
+    motor = MotorFiltros(df, IndiceBusqueda(df))
+    # Dos pasadas: la segunda sale de las máscaras cacheadas
+    for texto in secuencia + secuencia:
+        assert np.array_equal(motor.mascara({'PRODUCTO': texto}), _esperada(df, texto)), texto
+
+
+def test_combina_filtros_y_refina_fechas():
+    df = _df()
+    motor = MotorFiltros(df, IndiceBusqueda(df))
+    for inicio, fin in [('2024-01-01', '2024-03-31'), ('2024-01-15', '2024-02-28'), ('2024-01-01', '2024-03-31')]:
+        filtros = {'fecha': (inicio, fin), 'PRODUCTO': 'tor', 'Section': ['I', 'II']}
+        esperada = (
+            _esperada(df, 'tor')
+            & df['DD'].between(pd.Timestamp(inicio), pd.Timestamp(fin)).to_numpy()
+            & df['Section'].isin(['I', 'II']).to_numpy()
+        )
+        assert np.array_equal(motor.mascara(filtros), esperada)
@@ -0,0 +1,45 @@
+import uuid
+
+import pandas as pd
+import pytest
+
+import utils.particiones as particiones
+
+
+@pytest.fixture(autouse=True)
+def carpeta_sesiones(tmp_path, monkeypatch):
+    monkeypatch.setattr(particiones, 'CARPETA_SESIONES', str(tmp_path / 'sesiones'))
+
+
+def _upload(fechas, producto):
+    return pd.DataFrame({
+        'DD': pd.to_datetime(fechas),
+        'PRODUCTO': [producto] * len(fechas),
+        'CIF_ITEM': [1.0] * len(fechas),
+    })
+
+
+def test_sesiones_no_ven_datos_de_otras():
+    sesion_a, sesion_b = uuid.uuid4().hex, uuid.uuid4().hex
+    particiones.agregar_a_sesion(sesion_a, _upload(['2024-01-10', '2024-02-05'], 'A'), 'clave-a')
+    particiones.agregar_a_sesion(sesion_b, _upload(['2024-02-20', '2024-03-15'], 'B'), 'clave-b')
+
+    assert particiones.meses_sesion(sesion_a) == ['2024-01', '2024-02']
+    assert particiones.meses_sesion(sesion_b) == ['2024-02', '2024-03']
+
+    filas_a = particiones.leer_sesion(sesion_a)
+    filas_b = particiones.leer_sesion(sesion_b)
+    assert set(filas_a['PRODUCTO']) == {'A'} and len(filas_a) == 2
+    assert set(filas_b['PRODUCTO']) == {'B'} and len(filas_b) == 2
+
+    # Mismo mes en ambas sesiones: cada una lee solo sus filas
+    assert list(particiones.leer_sesion(sesion_a, meses=['2024-02'])['PRODUCTO']) == ['A']
+    assert particiones.rango_sesion(sesion_a) == (pd.Timestamp('2024-01-10'), pd.Timestamp('2024-02-05'))
+    assert particiones.rango_sesion(sesion_b) == (pd.Timestamp('2024-02-20'), pd.Timestamp('2024-03-15'))
+
+
+@pytest.mark.parametrize('session_id', ['auto', None, '../otra', 'A' * 32])
+def test_id_de_sesion_compartido_o_invalido_no_se_particiona(session_id):
+    with pytest.raises(particiones.SesionInvalida):
+        particiones.agregar_a_sesion(session_id, _upload(['2024-01-10'], 'A'), 'clave')
+    assert particiones.meses_sesion(session_id) == []
@@ -0,0 +1,271 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentacion import medir_etapa
+
+try:
+    from pyarrow import feather
+    ARROW_DISPONIBLE = True
+except ImportError:
+    ARROW_DISPONIBLE = False
+
+
+# Presupuesto de memoria para los datasets cargados (bytes). Lo que no cabe se baja a disco.
+MEMORIA_MAXIMA = int(os.environ.get('DATASETS_MEMORIA_MAXIMA', 2 * 1024 ** 3))
+# Cantidad máxima de datasets que se conservan en disco antes de borrar los más antiguos
+MAX_DATASETS_DISCO = int(os.environ.get('DATASETS_MAX_DISCO', 20))
+CARPETA_DATASETS = os.path.join('cache', 'datasets')
+# Horas sin uso tras las que se borran los archivos Arrow (cada acceso, de cualquier worker, renueva el mtime)
+MAX_HORAS_ARROW = float(os.environ.get('DATASETS_MAX_HORAS_ARROW', 24))
+# Segundos entre renovaciones del mtime de un mismo dataset
+INTERVALO_ACCESO = 60
+
+_lock = threading.RLock()
+_en_memoria = OrderedDict()  # dataset_id -> {'df': DataFrame, 'bytes': int, 'artefactos': dict, 'acceso': float}
+_en_disco = OrderedDict()    # dataset_id -> ruta del archivo
+_por_sesion = {}             # session_id -> dataset_id
+
+
+class DatasetNoDisponible(KeyError):
+    pass
+
+
+def _ruta_disco(dataset_id):
+    return os.path.join(CARPETA_DATASETS, f'{dataset_id}.pkl')
+
+
+def _ruta_arrow(dataset_id):
+    return os.path.join(CARPETA_DATASETS, f'{dataset_id}.arrow')
+
+
+def _escribir_arrow(dataset_id, df):
+    # Arrow IPC sin compresión: se puede mapear en memoria desde cualquier proceso.
+    # El texto libre (DOTRO1, DESOBS1, ...) se guarda como diccionario: al leerlo cada
+    # worker arma solo los valores únicos, no un string de Python por fila
+    os.makedirs(CARPETA_DATASETS, exist_ok=True)
+    ruta = _ruta_arrow(dataset_id)
+    texto = {col: 'category' for col in df.columns if df[col].dtype == object}
+    feather.write_feather(df.astype(texto) if texto else df, ruta + '.tmp', compression='uncompressed')
+    os.replace(ruta + '.tmp', ruta)
+    return ruta
+
+
+def _leer_arrow(ruta):
+    # Las columnas numéricas sin nulos quedan como vistas sobre el mapa, sin copiarse;
+    # las páginas las comparte el sistema operativo entre todos los workers
+    tabla = feather.read_table(ruta, memory_map=True)
+    return tabla.to_pandas(split_blocks=True)
+
+
+def _es_mapeado(arreglo):
+    # Vista sobre un buffer de Arrow (páginas del archivo mapeado), no memoria propia del proceso
+    base = arreglo
+    while isinstance(base, np.ndarray):
+        if base.flags.owndata:
+            return False
+        base = base.base
+    return base is not None
+
+
+def _bytes_privados(df):
+    # Lo que el dataset ocupa en este proceso: las columnas mapeadas las comparte el sistema operativo
+    bytes_columnas = df.memory_usage(deep=True)
+    return int(sum(
+        tamano for col, tamano in bytes_columnas.items()
+        if col == 'Index' or not (isinstance(df[col].values, np.ndarray) and _es_mapeado(df[col].values))
+    ))
+
+
+def _registrar_acceso(dataset_id, entrada):
+    # El mtime del Arrow marca el último uso desde cualquier worker: lo usa _limpiar_arrow
+    ahora = time.time()
+    if ahora - entrada.get('acceso', 0) < INTERVALO_ACCESO:
+        return
+    entrada['acceso'] = ahora
+    try:
+        os.utime(_ruta_arrow(dataset_id))
+    except OSError:
+        pass
+
+
+def _limpiar_arrow(max_horas=MAX_HORAS_ARROW):
+    with _lock:
+        if not os.path.isdir(CARPETA_DATASETS):
+            return
+        ahora = time.time()
+        for nombre in os.listdir(CARPETA_DATASETS):
+            dataset_id, extension = os.path.splitext(nombre)
+            ruta = os.path.join(CARPETA_DATASETS, nombre)
+            if extension != '.arrow' or dataset_id in _en_memoria:
+                continue
+            try:
+                if ahora - os.path.getmtime(ruta) > max_horas * 3600:
+                    os.remove(ruta)
+            except OSError:
+                # Ya borrado por otro worker, o mapeado por otro proceso en Windows
+                pass
+
+
+def _memoria_usada():
+    return sum(entrada['bytes'] for entrada in _en_memoria.values())
+
+
+def _bajar_a_disco(dataset_id, entrada):
+    os.makedirs(CARPETA_DATASETS, exist_ok=True)
+    if ARROW_DISPONIBLE and os.path.exists(_ruta_arrow(dataset_id)):
+        # Ya está escrito en Arrow desde que se registró: basta con soltarlo
+        ruta = _ruta_arrow(dataset_id)
+    else:
+        ruta = _ruta_disco(dataset_id)
+        entrada['df'].to_pickle(ruta)
+    _en_disco[dataset_id] = ruta
+    print(f"💾 Dataset {dataset_id} bajado a disco ({entrada['bytes'] / 1024 ** 2:,.1f} MB)")
+
+    while len(_en_disco) > MAX_DATASETS_DISCO:
+        viejo_id, viejo_ruta = _en_disco.popitem(last=False)
+        # El Arrow es compartido: otros workers pueden tenerlo mapeado o con un handle vivo.
+        # Este worker solo lo olvida; lo borran liberar_dataset o _limpiar_arrow
+        if viejo_ruta.endswith('.pkl') and os.path.exists(viejo_ruta):
+            os.remove(viejo_ruta)
+
+
+def _aplicar_presupuesto(conservar=None):
+    # LRU: se bajan a disco los datasets usados hace más tiempo hasta volver al presupuesto
+    while _memoria_usada() > MEMORIA_MAXIMA and len(_en_memoria) > 1:
+        dataset_id = next(iter(_en_memoria))
+        if dataset_id == conservar:
+            _en_memoria.move_to_end(dataset_id)
+            dataset_id = next(iter(_en_memoria))
+        _bajar_a_disco(dataset_id, _en_memoria.pop(dataset_id))
+
+
+def _guardar_en_memoria(dataset_id, df):
+    _en_memoria[dataset_id] = {'df': df, 'bytes': _bytes_privados(df), 'artefactos': {}, 'acceso': time.time()}
+    _en_memoria.move_to_end(dataset_id)
+    _aplicar_presupuesto(conservar=dataset_id)
+
+
+def registrar_dataset(df, session_id=None, **metadatos):
+    """
+    Guarda el DataFrame procesado en el almacén del servidor y retorna el handle
+    liviano que se deja en dcc.Store. Si la sesión ya tenía un dataset, se libera.
+    `metadatos` se agregan al handle (deben ser serializables a JSON).
+    """
+    dataset_id = uuid.uuid4().hex
+    filas = len(df)
+    if ARROW_DISPONIBLE:
+        # Respaldo compartido: todos los workers, también este, usan el archivo mapeado
+        # en vez de una copia privada del DataFrame
+        try:
+            df = _leer_arrow(_escribir_arrow(dataset_id, df))
+        except Exception as e:
+            print(f"⚠️ No se pudo escribir el dataset en Arrow ({e}), queda solo en memoria")
+        _limpiar_arrow()
+
+    with _lock:
+        if session_id is not None:
+            anterior = _por_sesion.get(session_id)
+            if anterior is not None:
+                liberar_dataset(anterior)
+            _por_sesion[session_id] = dataset_id
+        _guardar_en_memoria(dataset_id, df)
+
+    return {'dataset_id': dataset_id, 'session_id': session_id, 'filas': filas, **metadatos}
+
+
+def _dataset_id(handle):
+    if isinstance(handle, dict):
+        return handle.get('dataset_id')
+    return handle
+
+
+def obtener_dataset(handle):
+    """
+    Retorna el DataFrame asociado al handle. El DataFrame es compartido:
+    quien lo use no debe modificarlo en el lugar. Si otro proceso registró el
+    dataset, se mapea desde su archivo Arrow.
+    """
+    dataset_id = _dataset_id(handle)
+    with _lock:
+        entrada = _en_memoria.get(dataset_id)
+        if entrada is not None:
+            _en_memoria.move_to_end(dataset_id)
+            _registrar_acceso(dataset_id, entrada)
+            return entrada['df']
+
+        ruta = _en_disco.pop(dataset_id, None)
+        if ruta is None and ARROW_DISPONIBLE:
+            ruta = _ruta_arrow(dataset_id)
+        if ruta is None or not os.path.exists(ruta):
+            raise DatasetNoDisponible(dataset_id)
+
+        if ruta.endswith('.arrow'):
+            # El archivo se conserva: sigue siendo el respaldo para los demás procesos
+            df = _leer_arrow(ruta)
+            os.utime(ruta)
+        else:
+            df = pd.read_pickle(ruta)
+            os.remove(ruta)
+        _guardar_en_memoria(dataset_id, df)
+        return df
+
+
+def tomar_filas(handle, indices):
+    """
+    Filas del dataset en las posiciones `indices` (array de enteros, por
+    ejemplo np.flatnonzero de una máscara). Sobre un dataset mapeado solo se
+    leen las páginas de las filas pedidas.
+    """
+    return obtener_dataset(handle).take(indices)
+
+
+def obtener_artefacto(handle, nombre, constructor):
+    """
+    Estructura derivada del dataset (índices, cubos, ...) que se construye una
+    sola vez con `constructor(df)` y vive junto al dataset. Si el dataset se
+    baja a disco, sus artefactos se descartan y se reconstruyen al volver.
+    """
+    dataset_id = _dataset_id(handle)
+    df = obtener_dataset(handle)
+    with _lock:
+        entrada = _en_memoria.get(dataset_id)
+        if entrada is not None and nombre in entrada['artefactos']:
+            return entrada['artefactos'][nombre]
+
+    # Se construye fuera del lock para no bloquear a las demás sesiones
+    with medir_etapa(f'artefacto:{nombre}', filas=len(df)):
+        valor = constructor(df)
+    with _lock:
+        entrada = _en_memoria.get(dataset_id)
+        if entrada is not None:
+            valor = entrada['artefactos'].setdefault(nombre, valor)
+    return valor
+
+
+def liberar_dataset(dataset_id):
+    with _lock:
+        _en_memoria.pop(dataset_id, None)
+        rutas = [_en_disco.pop(dataset_id, None), _ruta_arrow(dataset_id)]
+        for ruta in rutas:
+            if ruta and os.path.exists(ruta):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    # Mapeado por otro proceso (Windows): lo borra _limpiar_arrow más adelante
+                    pass
+
+
+def estado_almacen():
+    with _lock:
+        return {
+            'en_memoria': len(_en_memoria),
+            'bytes_en_memoria': _memoria_usada(),
+            'memoria_maxima': MEMORIA_MAXIMA,
+            'en_disco': len(_en_disco),
+        }
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from plotly.utils import PlotlyJSONEncoder
+
+from utils.indice_busqueda import COLUMNAS_BUSQUEDA, clave_terminos
+from utils.instrumentacion import medir_etapa
+
+
+# Memoria máxima para los paneles ya armados (bytes, medida como el JSON que se envía al navegador)
+MAX_BYTES_FIGURAS = int(os.environ.get('FIGURAS_MAX_BYTES', 256 * 1024 ** 2))
+
+
+def _normalizar_valor(filtro, valor):
+    if filtro == 'fecha':
+        return tuple(pd.Timestamp(v).isoformat() for v in valor)
+    if filtro in COLUMNAS_BUSQUEDA and isinstance(valor, str):
+        # Misma clave que las máscaras de MotorFiltros
+        return clave_terminos(valor)
+    if isinstance(valor, (list, tuple)):
+        return tuple(sorted(set(valor)))
+    return valor
+
+
+def clave_filtros(filtros):
+    """
+    Tupla canónica de los filtros activos: los vacíos se omiten, las búsquedas
+    quedan como términos ordenados y las listas como conjuntos ordenados.
+    """
+    activos = []
+    for filtro, valor in sorted(filtros.items()):
+        if filtro == 'fecha':
+            if not valor or valor[0] is None or valor[1] is None:
+                continue
+        elif not valor:
+            continue
+        activos.append((filtro, _normalizar_valor(filtro, valor)))
+    return tuple(activos)
+
+
+class CacheFiguras:
+    """
+    LRU de paneles ya armados, con presupuesto de memoria. La clave la arma
+    quien llama (dataset, panel, filtros normalizados, columna del dropdown);
+    el tamaño de cada entrada es el de su JSON.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES_FIGURAS):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()  # clave -> (valor, bytes)
+        self._bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave, valor):
+        # Es la misma serialización que hace Dash al responder: se mide como etapa
+        with medir_etapa('serializacion_json'):
+            tamano = len(json.dumps(valor, cls=PlotlyJSONEncoder))
+        if tamano > self.max_bytes:
+            return valor
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._entradas[clave] = (valor, tamano)
+            self._bytes += tamano
+            while self._bytes > self.max_bytes:
+                _, (_, liberados) = self._entradas.popitem(last=False)
+                self._bytes -= liberados
+        return valor
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else None,
+            }
+
+
+# Cache compartido por todos los paneles del proceso
+cache_figuras = CacheFiguras()
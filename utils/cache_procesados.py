@@ -0,0 +1,93 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from utils.diccionarios import hash_archivo, obtener_tablas
+from utils.helpers import firma_referencias
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+
+CARPETA_PROCESADOS = os.path.join('cache', 'procesados')
+# Tamaño máximo del caché en disco; al pasarse se borran los archivos usados hace más tiempo
+MAX_BYTES_PROCESADOS = int(os.environ.get('PROCESADOS_MAX_BYTES', 5 * 1024 ** 3))
+# Subir cuando cambie lo que produce el pipeline de ingesta, para invalidar el caché
+VERSION_PIPELINE = 6
+
+EXTENSIONES = ('.parquet', '.pkl')
+
+
+def clave_archivo(filepath):
+    """
+    Clave de caché de un upload: contenido del archivo + versión del pipeline
+    + versión del diccionario y de los archivos de referencia con que se enriqueció.
+    """
+    partes = f"{hash_archivo(filepath)}-{VERSION_PIPELINE}-{obtener_tablas()['sha256']}-{firma_referencias()}"
+    return hashlib.sha256(partes.encode()).hexdigest()
+
+
+def _ruta(clave, extension):
+    return os.path.join(CARPETA_PROCESADOS, clave + extension)
+
+
+def cargar_procesado(clave):
+    """Retorna el DataFrame procesado para la clave o None si no está en caché."""
+    for extension in EXTENSIONES:
+        ruta = _ruta(clave, extension)
+        if not os.path.exists(ruta):
+            continue
+        try:
+            df = pd.read_parquet(ruta) if extension == '.parquet' else pd.read_pickle(ruta)
+        except Exception as e:
+            print(f"⚠️ Caché corrupto, se descarta {ruta}: {e}")
+            os.remove(ruta)
+            return None
+        # Marca de uso para la expulsión por antigüedad
+        os.utime(ruta)
+        print(f"⚡ Upload encontrado en caché: {ruta}")
+        return df
+    return None
+
+
+def guardar_procesado(clave, df):
+    os.makedirs(CARPETA_PROCESADOS, exist_ok=True)
+    ruta = None
+    if PARQUET_DISPONIBLE:
+        ruta = _ruta(clave, '.parquet')
+        try:
+            df.to_parquet(ruta + '.tmp', index=False)
+        except Exception as e:
+            # Columnas object con tipos mezclados no pasan a Parquet; se guarda en pickle
+            print(f"⚠️ No se pudo guardar en Parquet ({e}), se usa pickle")
+            ruta = None
+    if ruta is None:
+        ruta = _ruta(clave, '.pkl')
+        df.to_pickle(ruta + '.tmp', compression=None)
+    os.replace(ruta + '.tmp', ruta)
+    limpiar_cache_procesados()
+    return ruta
+
+
+def limpiar_cache_procesados(max_bytes=MAX_BYTES_PROCESADOS):
+    if not os.path.isdir(CARPETA_PROCESADOS):
+        return
+    archivos = []
+    for nombre in os.listdir(CARPETA_PROCESADOS):
+        if not nombre.endswith(EXTENSIONES):
+            continue
+        ruta = os.path.join(CARPETA_PROCESADOS, nombre)
+        stat = os.stat(ruta)
+        archivos.append((stat.st_mtime, stat.st_size, ruta))
+
+    total = sum(tamano for _, tamano, _ in archivos)
+    for _, tamano, ruta in sorted(archivos):
+        if total <= max_bytes:
+            break
+        os.remove(ruta)
+        total -= tamano
+        print(f"🧹 Caché de uploads: se eliminó {ruta}")
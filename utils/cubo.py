@@ -0,0 +1,75 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# Dimensiones del cubo mensual; HS Description depende 1 a 1 del capítulo
+DIMENSIONES_CUBO = ['MES', 'PA_ORIG', 'PA_ADQ', 'Section', 'Chapter', 'HS Description', 'CODCOMUN', 'VIA_TRAN']
+# Filtros del dashboard que se pueden resolver sobre el cubo (además de la fecha)
+FILTROS_TEXTO_CUBO = ['PA_ORIG', 'PA_ADQ', 'CODCOMUN']
+FILTROS_LISTA_CUBO = ['Section', 'HS Description']
+
+
+class CuboMensual:
+    """
+    Sumas de CIF_ITEM y CANT_MERC y conteo de filas por mes y dimensiones del
+    cubo, calculadas una vez al subir el archivo. Las series mensuales y los
+    heatmaps se pueden responder desde acá mientras los filtros activos sean
+    dimensiones del cubo; con búsquedas de texto libre hay que ir a las filas.
+    """
+
+    def __init__(self, df):
+        dimensiones = [col for col in DIMENSIONES_CUBO if col == 'MES' or col in df.columns]
+        datos = df[[col for col in dimensiones if col != 'MES']].assign(
+            MES=df['DD'].dt.to_period('M'),
+            CIF_ITEM=df['CIF_ITEM'],
+            CANT_MERC=pd.to_numeric(df['CANT_MERC'], errors='coerce'),
+            filas=1,
+        )
+        # dropna=False: las filas sin país o comuna también cuentan en los totales
+        self.cubo = (
+            datos.groupby(dimensiones, observed=True, dropna=False, sort=False)
+            .agg(CIF_ITEM=('CIF_ITEM', 'sum'), CANT_MERC=('CANT_MERC', 'sum'), filas=('filas', 'sum'))
+            .reset_index()
+        )
+        # Fecha mínima y máxima real de cada mes, para saber si un rango lo cubre completo
+        self.rango_meses = df.groupby(df['DD'].dt.to_period('M'))['DD'].agg(['min', 'max'])
+
+    def _mascara_fechas(self, inicio, fin):
+        dentro = (self.rango_meses['min'] >= inicio) & (self.rango_meses['max'] <= fin)
+        fuera = (self.rango_meses['max'] < inicio) | (self.rango_meses['min'] > fin)
+        if not (dentro | fuera).all():
+            # El rango corta un mes por la mitad: el cubo no alcanza
+            return None
+        return self.cubo['MES'].isin(self.rango_meses.index[dentro]).to_numpy()
+
+    def responder(self, filtros):
+        """
+        Retorna las filas del cubo que cumplen los filtros, o None si algún
+        filtro activo no se puede resolver con las dimensiones del cubo.
+        """
+        mascara = self.cubo['MES'].notna().to_numpy()
+        for filtro, valor in filtros.items():
+            if filtro == 'fecha':
+                if not valor or valor[0] is None or valor[1] is None:
+                    continue
+                fechas = self._mascara_fechas(pd.Timestamp(valor[0]), pd.Timestamp(valor[1]))
+                if fechas is None:
+                    return None
+                mascara &= fechas
+            elif not valor:
+                continue
+            elif filtro in FILTROS_TEXTO_CUBO and filtro in self.cubo.columns:
+                terminos = [t.strip() for t in valor.split(',')]
+                try:
+                    coincide = self.cubo[filtro].str.contains('|'.join(terminos), case=False, na=False)
+                except re.error:
+                    return None
+                mascara &= np.asarray(coincide, dtype=bool)
+            elif filtro in FILTROS_LISTA_CUBO and filtro in self.cubo.columns:
+                valores = valor if isinstance(valor, list) else [valor]
+                mascara &= self.cubo[filtro].isin(valores).to_numpy()
+            else:
+                return None
+        return self.cubo[mascara]
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+
+DICCIONARIO_PATH = os.path.join('data', 'DICCIONARIO.xlsx')
+CARPETA_COMPILADOS = os.path.join('cache', 'diccionarios')
+
+HOJAS_GLOSA = ['PAIS', 'BULTO', 'CARGA', 'TRANSPORTE', 'COMUNA', 'ADUANA', 'PUERTOS', 'OPERACION']
+HOJA_CATEGORIA_HS = 'CATEGORIA_HS'
+
+_lock = threading.Lock()
+_cache = {'firma': None, 'tablas': None}
+
+
+def hash_archivo(ruta, bloque=1024 * 1024):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for parte in iter(lambda: f.read(bloque), b''):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def _compilar(ruta):
+    # Una sola pasada por el libro para todas las hojas
+    hojas = pd.read_excel(ruta, sheet_name=HOJAS_GLOSA + [HOJA_CATEGORIA_HS])
+
+    glosas = {}
+    for hoja in HOJAS_GLOSA:
+        df_hoja = hojas[hoja]
+        glosas[hoja] = pd.Series(df_hoja['Glosa'].values, index=df_hoja['Código'].values, name=hoja)
+
+    categoria_hs = hojas[HOJA_CATEGORIA_HS]
+    categoria_hs.columns = categoria_hs.columns.str.strip()
+    categoria_hs['Chapter'] = categoria_hs['Chapter'].astype(str).str[:2]
+    categoria_hs = categoria_hs[['Chapter', 'HS Description', 'Section']].reset_index(drop=True)
+
+    return {
+        'glosas': glosas,
+        'diccionarios': {hoja: serie.to_dict() for hoja, serie in glosas.items()},
+        'categoria_hs': categoria_hs,
+    }
+
+
+def _cargar_compilado(ruta):
+    digest = hash_archivo(ruta)
+    compilado = os.path.join(CARPETA_COMPILADOS, f'DICCIONARIO-{digest[:16]}.pkl')
+
+    if os.path.exists(compilado):
+        with open(compilado, 'rb') as f:
+            tablas = pickle.load(f)
+        tablas['sha256'] = digest
+        return tablas
+
+    print("📚 Compilando DICCIONARIO.xlsx")
+    tablas = _compilar(ruta)
+    tablas['sha256'] = digest
+    os.makedirs(CARPETA_COMPILADOS, exist_ok=True)
+    temporal = compilado + '.tmp'
+    with open(temporal, 'wb') as f:
+        pickle.dump(tablas, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, compilado)
+    return tablas
+
+
+def _tabla_codigos(glosas):
+    """
+    Prepara una hoja para codificar por indexación: las glosas únicas (ordenadas)
+    son las categorías y `lookup[codigo]` da la posición de su glosa (-1 si no hay).
+    """
+    # Igual que dict(): ante códigos repetidos manda el último
+    glosas = glosas[~glosas.index.duplicated(keep='last')]
+    categorias = pd.Index(glosas.dropna().unique()).sort_values()
+    posiciones = categorias.get_indexer(glosas.values).astype(np.int32)
+
+    lookup = None
+    codigos = pd.to_numeric(pd.Series(glosas.index), errors='coerce')
+    if len(codigos) and codigos.notna().all() and (codigos >= 0).all() and (codigos == codigos.round()).all():
+        lookup = np.full(int(codigos.max()) + 1, -1, dtype=np.int32)
+        lookup[codigos.astype(np.int64).to_numpy()] = posiciones
+
+    return {
+        'categorias': categorias,
+        'lookup': lookup,
+        'por_codigo': dict(zip(glosas.index, posiciones)),
+    }
+
+
+def codificar_glosas(valores, tabla):
+    """
+    Convierte una columna de códigos en un Categorical de glosas sin pasar por
+    Series.map: los códigos numéricos indexan directo el arreglo `lookup` y el
+    resto se resuelve una vez por valor único.
+    """
+    lookup = tabla['lookup']
+    if lookup is not None and is_numeric_dtype(valores.dtype):
+        numeros = valores.to_numpy(dtype='float64', na_value=np.nan)
+        validos = np.isfinite(numeros) & (numeros >= 0) & (numeros < len(lookup)) & (numeros == np.floor(numeros))
+        codigos = np.full(len(numeros), -1, dtype=np.int32)
+        codigos[validos] = lookup[numeros[validos].astype(np.int64)]
+    else:
+        internos, unicos = pd.factorize(valores)
+        por_codigo = tabla['por_codigo']
+        posiciones = np.array([por_codigo.get(u, -1) for u in unicos] + [-1], dtype=np.int32)
+        # factorize marca los nulos con -1, que cae en el -1 agregado al final
+        codigos = posiciones[internos]
+
+    return pd.Categorical.from_codes(codigos, categories=tabla['categorias'])
+
+
+def _tabla_capitulos(categoria_hs):
+    """
+    Arreglos de 100 posiciones indexados por capítulo HS (0-99) con la
+    posición de su Chapter, HS Description y Section dentro de las categorías.
+    """
+    capitulos = pd.to_numeric(categoria_hs['Chapter'], errors='coerce')
+    validos = categoria_hs[capitulos.between(0, 99)].assign(numero=capitulos.astype('Int64'))
+    validos = validos.drop_duplicates('numero', keep='last')
+
+    tablas = {}
+    for col in ['Chapter', 'HS Description', 'Section']:
+        categorias = pd.Index(validos[col].dropna().unique()).sort_values()
+        lookup = np.full(100, -1, dtype=np.int32)
+        lookup[validos['numero'].to_numpy(dtype=np.int64)] = categorias.get_indexer(validos[col])
+        tablas[col] = {'categorias': categorias, 'lookup': lookup}
+    return tablas
+
+
+def obtener_tablas_capitulos():
+    return obtener_tablas()['capitulos']
+
+
+def tablas_codigos(dicts=None):
+    """Tablas de codificación por hoja; sin argumentos usa las del diccionario cacheado."""
+    if dicts is None:
+        return obtener_tablas()['codigos']
+    return {hoja: _tabla_codigos(pd.Series(mapeo)) for hoja, mapeo in dicts.items()}
+
+
+def obtener_tablas(ruta=DICCIONARIO_PATH):
+    """
+    Retorna las tablas del diccionario compiladas. El Excel solo se parsea la
+    primera vez que aparece una versión nueva (mtime + hash); después se lee
+    el compilado en disco y queda en memoria mientras viva el proceso.
+    """
+    stat = os.stat(ruta)
+    firma = (ruta, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if _cache['firma'] != firma:
+            tablas = _cargar_compilado(ruta)
+            tablas['codigos'] = {hoja: _tabla_codigos(serie) for hoja, serie in tablas['glosas'].items()}
+            tablas['capitulos'] = _tabla_capitulos(tablas['categoria_hs'])
+            _cache['tablas'] = tablas
+            _cache['firma'] = firma
+        return _cache['tablas']
+
+
+def obtener_glosas(hoja):
+    """Serie código -> glosa de la hoja indicada."""
+    return obtener_tablas()['glosas'][hoja]
+
+
+def obtener_categoria_hs():
+    """Tabla Chapter -> HS Description / Section."""
+    return obtener_tablas()['categoria_hs']
@@ -0,0 +1,173 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# Columnas que muestra el explorador de transacciones
+COLUMNAS_EXPLORADOR = [
+    'PRODUCTO', 'TPO_DOCTO', 'ARANC_NAC', 'NUM_UNICO_IMPORTADOR', 'CIF_ITEM', 'CANT_MERC', 'DESOBS1', 'DD',
+    'CODCOMUN', 'ADU', 'PTO_DESEM', 'PTO_EMB', 'VIA_TRAN'
+]
+# Columnas con orden precalculado; el resto se ordena sobre las filas filtradas
+COLUMNAS_ORDEN = ['CIF_ITEM', 'DD', 'CANT_MERC']
+FILAS_POR_PAGINA = 25
+
+# Una condición del filter_query de la DataTable: {columna} operador valor
+PATRON_CONDICION = re.compile(
+    r'^\{(?P<columna>[^}]+)\}\s*(?P<operador>[si]?(?:>=|<=|!=|=|<|>|eq|ne|ge|le|gt|lt|contains|datestartswith))\s+(?P<valor>.+)$'
+)
+OPERADORES = {'eq': '=', 'ne': '!=', 'ge': '>=', 'le': '<=', 'gt': '>', 'lt': '<'}
+
+
+def _claves_orden(serie):
+    # Valores como float para ordenar: fechas en ns, NaN/NaT al final
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        valores = serie.to_numpy(dtype='datetime64[ns]')
+        claves = valores.view(np.int64).astype(np.float64)
+        claves[np.isnat(valores)] = np.nan
+        return claves
+    return pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class IndiceOrden:
+    """
+    Permutación ascendente de las filas del dataset por cada columna de
+    COLUMNAS_ORDEN (NaN al final), calculada una vez por dataset. Ordenar un
+    subconjunto filtrado es recorrer la permutación y quedarse con las filas
+    que pasan: O(n) en vez de un sort por cada página.
+    """
+
+    def __init__(self, df):
+        tipo = np.int32 if len(df) < 2 ** 31 else np.int64
+        self.ordenes = {}
+        self.validos = {}
+        for col in COLUMNAS_ORDEN:
+            if col not in df.columns:
+                continue
+            claves = _claves_orden(df[col])
+            self.ordenes[col] = np.argsort(claves, kind='stable').astype(tipo)
+            self.validos[col] = int(np.count_nonzero(~np.isnan(claves)))
+
+    def filas_ordenadas(self, columna, mascara):
+        """
+        Posiciones de las filas de `mascara` en orden ascendente por `columna`
+        y cuántas de ellas tienen valor (las primeras; los NaN van al final).
+        """
+        orden = self.ordenes[columna]
+        validos = self.validos[columna]
+        if mascara is None:
+            return orden, validos
+        return orden[mascara[orden]], int(np.count_nonzero(mascara[orden[:validos]]))
+
+
+def _valor_condicion(texto):
+    # Texto tal cual (sin comillas): recién el operador decide si se compara como número
+    texto = texto.strip()
+    if len(texto) >= 2 and texto[0] == texto[-1] and texto[0] in ('"', "'", '`'):
+        return texto[1:-1].replace('\\' + texto[0], texto[0]), True
+    return texto, False
+
+
+def _como_numero(valor):
+    try:
+        return float(valor)
+    except ValueError:
+        return valor
+
+
+def parsear_filter_query(filter_query):
+    """Condiciones (columna, operador, valor) del filter_query; las que no se entienden se ignoran."""
+    condiciones = []
+    for parte in (filter_query or '').split(' && '):
+        coincidencia = PATRON_CONDICION.match(parte.strip())
+        if coincidencia is None:
+            continue
+        operador = coincidencia['operador'].lstrip('si')
+        operador = OPERADORES.get(operador, operador)
+        valor, entre_comillas = _valor_condicion(coincidencia['valor'])
+        # contains y datestartswith trabajan sobre el texto: '5885' no puede volverse '5885.0'
+        if operador not in ('contains', 'datestartswith') and not entre_comillas:
+            valor = _como_numero(valor)
+        condiciones.append((coincidencia['columna'], operador, valor))
+    return condiciones
+
+
+def _mascara_condicion(serie, operador, valor):
+    if operador == 'contains':
+        # 'string' y no str: las celdas vacías quedan como NA y no como el texto 'nan'
+        texto = serie.astype('string').str.lower()
+        return texto.str.contains(str(valor).lower(), regex=False, na=False).to_numpy(dtype=bool)
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        try:
+            periodo = pd.Period(valor if isinstance(valor, str) else format(valor, 'g'))
+        except ValueError:
+            return None
+        inicio, fin = periodo.start_time, periodo.end_time
+        en_periodo = ((serie >= inicio) & (serie <= fin)).to_numpy()
+        if operador in ('datestartswith', '='):
+            return en_periodo
+        if operador == '!=':
+            return ~en_periodo
+        valor = inicio if operador in ('>=', '<') else fin
+    elif operador == 'datestartswith':
+        return serie.astype('string').str.startswith(str(valor), na=False).to_numpy(dtype=bool)
+    elif isinstance(valor, float) and not pd.api.types.is_numeric_dtype(serie):
+        serie = pd.to_numeric(serie.astype(str), errors='coerce')
+
+    comparaciones = {
+        '=': serie.__eq__, '!=': serie.__ne__, '>=': serie.__ge__,
+        '<=': serie.__le__, '>': serie.__gt__, '<': serie.__lt__,
+    }
+    try:
+        return np.asarray(comparaciones[operador](valor), dtype=bool)
+    except (KeyError, TypeError):
+        return None
+
+
+def aplicar_filter_query(df, filas, filter_query):
+    """
+    Angosta `filas` (posiciones en `df`) con las condiciones del filter_query.
+    Cada condición se evalúa solo sobre las filas que siguen pasando.
+    """
+    for columna, operador, valor in parsear_filter_query(filter_query):
+        if columna not in df.columns or not len(filas):
+            continue
+        pasa = _mascara_condicion(df[columna].take(filas), operador, valor)
+        if pasa is not None:
+            filas = filas[pasa]
+    return filas
+
+
+def _pagina_valida(pagina, total, filas_por_pagina):
+    # Si los filtros achicaron el resultado, la página pedida puede ya no existir
+    paginas = max(-(-total // filas_por_pagina), 1)
+    return min(pagina, paginas - 1), paginas
+
+
+def pagina_ordenada(indice_orden, df, mascara, sort_by, pagina, filas_por_pagina=FILAS_POR_PAGINA):
+    """
+    Posiciones de las filas de una página, la página efectiva y la cantidad de
+    páginas. `mascara` es la máscara de filas que pasan (None = todas) y
+    `sort_by` viene de la DataTable.
+    """
+    columna = sort_by[0]['column_id'] if sort_by else 'CIF_ITEM'
+    descendente = sort_by[0]['direction'] == 'desc' if sort_by else True
+
+    if columna in indice_orden.ordenes:
+        filas, validos = indice_orden.filas_ordenadas(columna, mascara)
+        pagina, paginas = _pagina_valida(pagina, len(filas), filas_por_pagina)
+        desde = pagina * filas_por_pagina
+        posiciones = np.arange(desde, min(desde + filas_por_pagina, len(filas)))
+        if descendente:
+            # Mayores primero, pero los NaN siguen al final
+            posiciones = np.where(posiciones < validos, validos - 1 - posiciones, posiciones)
+        return filas[posiciones], pagina, paginas
+
+    filas = np.flatnonzero(mascara) if mascara is not None else np.arange(len(df))
+    pagina, paginas = _pagina_valida(pagina, len(filas), filas_por_pagina)
+    desde = pagina * filas_por_pagina
+    valores = df[columna].take(filas).reset_index(drop=True)
+    orden = valores.sort_values(ascending=not descendente, kind='stable', na_position='last').index.to_numpy()
+    return filas[orden[desde:desde + filas_por_pagina]], pagina, paginas
@@ -0,0 +1,125 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.indice_busqueda import METACARACTERES_REGEX, clave_terminos
+from utils.instrumentacion import medir_etapa
+
+
+# Memoria máxima para las máscaras cacheadas de cada dataset (bytes)
+MAX_BYTES_MASCARAS = int(os.environ.get('FILTROS_MAX_BYTES', 256 * 1024 ** 2))
+
+COLUMNAS_SELECCION_MULTIPLE = ['Section', 'HS Description']
+
+
+def _normalizar_lista(valor):
+    if isinstance(valor, (list, tuple)):
+        return tuple(sorted(set(valor)))
+    return (valor,)
+
+
+class MotorFiltros:
+    """
+    Evalúa los filtros del dashboard como máscaras booleanas por fila.
+    Cada filtro se cachea por su valor y las máscaras se combinan con AND, así
+    cambiar un input recalcula solo ese filtro. Si el nuevo valor angosta al
+    anterior (rango de fechas contenido, términos más largos, subconjunto de
+    secciones) solo se evalúan las filas que ya pasaban.
+
+    Filtros soportados (claves de `filtros`):
+      'fecha': (inicio, fin)
+      columnas del índice de búsqueda: texto separado por comas
+      'Section', 'HS Description': valor o lista de valores
+    """
+
+    def __init__(self, df, indice, max_bytes=MAX_BYTES_MASCARAS):
+        self.filas = len(df)
+        self.indice = indice
+        self.fechas = df['DD'].to_numpy(dtype='datetime64[ns]')
+        self.categoricas = {
+            col: pd.Categorical(df[col]) for col in COLUMNAS_SELECCION_MULTIPLE if col in df.columns
+        }
+        self.max_mascaras = max(1, max_bytes // max(self.filas, 1))
+
+        self._mascaras = OrderedDict()  # (filtro, clave) -> (máscara, bitmap de únicos o None)
+        self._ultimo = {}               # filtro -> clave evaluada más recientemente
+        self._lock = threading.Lock()
+
+    def _clave(self, filtro, valor):
+        if filtro == 'fecha':
+            return (pd.Timestamp(valor[0]), pd.Timestamp(valor[1]))
+        if filtro in self.indice.columnas:
+            return clave_terminos(valor)
+        return _normalizar_lista(valor)
+
+    def _es_refinamiento(self, filtro, anterior, nueva):
+        if filtro == 'fecha':
+            return anterior[0] <= nueva[0] and nueva[1] <= anterior[1]
+        if filtro in self.indice.columnas:
+            if any(c in METACARACTERES_REGEX for t in anterior + nueva for c in t):
+                return False
+            # Cada término nuevo contiene a alguno anterior: sus coincidencias son un subconjunto
+            return all(any(t in t_nuevo for t in anterior) for t_nuevo in nueva)
+        return set(nueva) <= set(anterior)
+
+    def _evaluar(self, filtro, valor, previo):
+        mascara_previa, unicos_previos = previo if previo is not None else (None, None)
+
+        if filtro in self.indice.columnas:
+            columna = self.indice.columnas[filtro]
+            unicos = columna.unicos_que_coinciden(valor, dentro_de=unicos_previos)
+            return columna.proyectar(unicos), unicos
+
+        filas = np.flatnonzero(mascara_previa) if mascara_previa is not None else None
+        if filtro == 'fecha':
+            inicio, fin = pd.Timestamp(valor[0]).to_datetime64(), pd.Timestamp(valor[1]).to_datetime64()
+            fechas = self.fechas if filas is None else self.fechas[filas]
+            parcial = (fechas >= inicio) & (fechas <= fin)
+        else:
+            categorica = self.categoricas[filtro]
+            categorica = categorica if filas is None else categorica[filas]
+            parcial = np.asarray(categorica.isin(list(_normalizar_lista(valor))))
+
+        if filas is None:
+            return parcial, None
+        mascara = np.zeros(self.filas, dtype=bool)
+        mascara[filas] = parcial
+        return mascara, None
+
+    def _mascara_filtro(self, filtro, valor):
+        clave = self._clave(filtro, valor)
+        with self._lock:
+            cacheada = self._mascaras.get((filtro, clave))
+            if cacheada is not None:
+                self._mascaras.move_to_end((filtro, clave))
+                self._ultimo[filtro] = clave
+                return cacheada[0]
+            anterior = self._ultimo.get(filtro)
+            previo = self._mascaras.get((filtro, anterior)) if anterior is not None else None
+
+        if previo is not None and not self._es_refinamiento(filtro, anterior, clave):
+            previo = None
+        with medir_etapa(f'filtro:{filtro}', filas=self.filas if previo is None else int(previo[0].sum())):
+            resultado = self._evaluar(filtro, valor, previo)
+
+        with self._lock:
+            self._mascaras[(filtro, clave)] = resultado
+            self._ultimo[filtro] = clave
+            while len(self._mascaras) > self.max_mascaras:
+                self._mascaras.popitem(last=False)
+        return resultado[0]
+
+    def mascara(self, filtros):
+        """Máscara combinada de los filtros activos (los valores vacíos se ignoran)."""
+        mascara = np.ones(self.filas, dtype=bool)
+        for filtro, valor in filtros.items():
+            if filtro == 'fecha':
+                if not valor or valor[0] is None or valor[1] is None:
+                    continue
+            elif not valor:
+                continue
+            mascara &= self._mascara_filtro(filtro, valor)
+        return mascara
@@ -1,6 +1,11 @@
 import pandas as pd
+import numpy as np
 import unicodedata
+import hashlib
 import os
+import pickle
+import threading
+from utils.diccionarios import codificar_glosas, hash_archivo, obtener_tablas, obtener_tablas_capitulos, tablas_codigos
 
 
 # Ruta centralizada del diccionario de estructura
@@ -45,19 +50,9 @@ def leer_txt_sin_encabezado(filepath, delimiter=';', decimal=','):
 
 
 
-DICCIONARIO_PATH = os.path.join('data', 'DICCIONARIO.xlsx')
-
 def cargar_diccionarios():
-    return {
-        'PAIS': pd.read_excel(DICCIONARIO_PATH, sheet_name='PAIS').set_index('Código')['Glosa'].to_dict(),
-        'BULTO': pd.read_excel(DICCIONARIO_PATH, sheet_name='BULTO').set_index('Código')['Glosa'].to_dict(),
-        'CARGA': pd.read_excel(DICCIONARIO_PATH, sheet_name='CARGA').set_index('Código')['Glosa'].to_dict(),
-        'TRANSPORTE': pd.read_excel(DICCIONARIO_PATH, sheet_name='TRANSPORTE').set_index('Código')['Glosa'].to_dict(),
-        'COMUNA': pd.read_excel(DICCIONARIO_PATH, sheet_name='COMUNA').set_index('Código')['Glosa'].to_dict(),
-        'ADUANA': pd.read_excel(DICCIONARIO_PATH, sheet_name='ADUANA').set_index('Código')['Glosa'].to_dict(),
-        'PUERTOS': pd.read_excel(DICCIONARIO_PATH, sheet_name='PUERTOS').set_index('Código')['Glosa'].to_dict(),
-        'OPERACION': pd.read_excel(DICCIONARIO_PATH, sheet_name='OPERACION').set_index('Código')['Glosa'].to_dict()
-    }
+    # Los diccionarios salen del caché compilado; el Excel no se parsea en cada upload
+    return obtener_tablas()['diccionarios']
 
 
 # Diccionario de códigos HS y sus industrias
@@ -101,37 +96,191 @@ def eliminar_acentos(texto):
         texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('utf-8')
     return texto
 
-# Cargar import.csv y crear diccionario
-import_df = pd.read_csv(os.path.join('data', 'import.txt'), sep='\t', encoding='utf-8')
-import_df['RUT'] = import_df['RUT'].astype(str).str.strip()
-import_dict = dict(zip(import_df['RUT'], import_df['RAZON_SOCIAL']))
+def aplicar_por_unicos(serie, funcion):
+    """
+    Equivalente a serie.apply(funcion), pero llama a la función una vez por
+    valor único y difunde el resultado a las filas con indexación.
+    """
+    codigos, unicos = pd.factorize(serie)
+    valores = [funcion(u) for u in unicos]
+    # factorize deja los nulos en -1: el último elemento es el resultado para NaN
+    valores.append(funcion(np.nan) if (codigos == -1).any() else None)
+    resultados = np.empty(len(valores), dtype=object)
+    resultados[:] = valores
+    return pd.Series(resultados[codigos], index=serie.index, name=serie.name)
 
-# Cargar comunas y puertos
-comunas_df = pd.read_csv(os.path.join('data', 'comunas.csv'))
-puertos_coords = pd.read_csv(os.path.join('data', 'puertos_coordenadas.csv'))
+def asignar_industria_serie(serie):
+    return aplicar_por_unicos(serie, asignar_industria)
 
-#Enriquecer datos
-def enriquecer_dataframe(df, dicts):
-    mapeos = {
-        'PA_ORIG': dicts['PAIS'],
-        'PA_ADQ': dicts['PAIS'],
-        'VIA_TRAN': dicts['TRANSPORTE'],
-        'TPO_CARGA': dicts['CARGA'],
-        'ID_BULTOS': dicts['BULTO'],
-        'CODCOMUN': dicts['COMUNA'],
-        'ADU': dicts['ADUANA'],
-        'PTO_DESEM': dicts['PUERTOS'],
-        'PTO_EMB': dicts['PUERTOS'],
-        'TPO_DOCTO': dicts['OPERACION']
+def normalizar_texto(texto):
+    if isinstance(texto, str):
+        return eliminar_acentos(texto.strip().lower())
+    return texto
+
+def normalizar_texto_serie(serie):
+    # strip + lower + sin acentos, calculado sobre los valores únicos
+    return aplicar_por_unicos(serie, normalizar_texto)
+
+# Datos de referencia: se cargan recién cuando alguien los pide, no al importar el módulo
+IMPORTADORES_PATH = os.path.join('data', 'import.txt')
+COMUNAS_PATH = os.path.join('data', 'comunas.csv')
+PUERTOS_PATH = os.path.join('data', 'puertos_coordenadas.csv')
+CARPETA_REFERENCIAS = os.path.join('cache', 'referencias')
+
+_referencias = {'firma': None, 'datos': None}
+_lock_referencias = threading.Lock()
+
+def _compilar_referencias():
+    import_df = pd.read_csv(IMPORTADORES_PATH, sep='\t', encoding='utf-8')
+    import_df['RUT'] = import_df['RUT'].astype(str).str.strip()
+    return {
+        'import_dict': dict(zip(import_df['RUT'], import_df['RAZON_SOCIAL'])),
+        'comunas': pd.read_csv(COMUNAS_PATH),
+        'puertos': pd.read_csv(PUERTOS_PATH),
     }
 
-    for col, mapping in mapeos.items():
-        if col in df.columns:
-            df[col] = df[col].map(mapping)
+def _cargar_referencias():
+    """
+    Carga import.txt, comunas.csv y puertos_coordenadas.csv una sola vez por
+    proceso. La primera vez que aparecen (mtime + tamaño) se guardan juntos en
+    un pickle en cache/referencias, que los procesos siguientes leen directo.
+    """
+    firma = tuple((ruta, os.stat(ruta).st_mtime_ns, os.stat(ruta).st_size)
+                  for ruta in (IMPORTADORES_PATH, COMUNAS_PATH, PUERTOS_PATH))
+    with _lock_referencias:
+        if _referencias['firma'] == firma:
+            return _referencias['datos']
+
+        paquete = os.path.join(CARPETA_REFERENCIAS, f"referencias-{hashlib.sha256(repr(firma).encode()).hexdigest()[:16]}.pkl")
+        if os.path.exists(paquete):
+            with open(paquete, 'rb') as f:
+                datos = pickle.load(f)
+        else:
+            print("📚 Compilando datos de referencia")
+            datos = _compilar_referencias()
+            os.makedirs(CARPETA_REFERENCIAS, exist_ok=True)
+            with open(paquete + '.tmp', 'wb') as f:
+                pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(paquete + '.tmp', paquete)
+
+        _referencias['datos'] = datos
+        _referencias['firma'] = firma
+        return datos
+
+_firmas_contenido = {}
+
+def firma_referencias():
+    """
+    Hash del contenido de los archivos de referencia que cambian el resultado
+    de la ingesta (import.txt, comunas.csv y la estructura del DIN). Cada
+    archivo se vuelve a leer solo si cambió su mtime o tamaño.
+    """
+    partes = []
+    with _lock_referencias:
+        for ruta in (IMPORTADORES_PATH, COMUNAS_PATH, DESCRIPCION_PATH):
+            estado = os.stat(ruta)
+            clave = (ruta, estado.st_mtime_ns, estado.st_size)
+            if clave not in _firmas_contenido:
+                _firmas_contenido[clave] = hash_archivo(ruta)
+            partes.append(_firmas_contenido[clave])
+    return hashlib.sha256('-'.join(partes).encode()).hexdigest()
+
+def obtener_import_dict():
+    """RUT del importador -> razón social."""
+    return _cargar_referencias()['import_dict']
 
-    for i in range(1, 9):
-        col = f'TPO_BUL{i}'
+def obtener_comunas():
+    """comunas.csv (comuna_id, region_id, nombre, latitud, longitud). No modificar: es compartido."""
+    return _cargar_referencias()['comunas']
+
+def obtener_puertos():
+    """puertos_coordenadas.csv (Puerto, Latitud, Longitud). No modificar: es compartido."""
+    return _cargar_referencias()['puertos']
+
+def ids_comunas(serie):
+    """
+    comuna_id de comunas.csv para cada nombre de comuna, cruzando por nombre
+    normalizado una vez por valor único. Las que no están en comunas.csv quedan en -1.
+    """
+    comunas = obtener_comunas()
+    por_nombre = {}
+    for comuna_id, nombre in zip(comunas['comuna_id'], comunas['nombre']):
+        por_nombre.setdefault(normalizar_texto(nombre), int(comuna_id))
+    ids = aplicar_por_unicos(serie, lambda x: por_nombre.get(normalizar_texto(x), -1))
+    return ids.astype(np.int16)
+
+def mapear_importadores(serie):
+    # RUT -> razón social; si el RUT no está se deja el RUT como texto
+    import_dict = obtener_import_dict()
+    return aplicar_por_unicos(serie, lambda x: import_dict.get(str(x), str(x)))
+
+# Columna del DIN -> hoja de DICCIONARIO.xlsx con sus glosas
+MAPEO_HOJAS = {
+    'PA_ORIG': 'PAIS',
+    'PA_ADQ': 'PAIS',
+    'VIA_TRAN': 'TRANSPORTE',
+    'TPO_CARGA': 'CARGA',
+    'ID_BULTOS': 'BULTO',
+    'CODCOMUN': 'COMUNA',
+    'ADU': 'ADUANA',
+    'PTO_DESEM': 'PUERTOS',
+    'PTO_EMB': 'PUERTOS',
+    'TPO_DOCTO': 'OPERACION',
+    **{f'TPO_BUL{i}': 'BULTO' for i in range(1, 9)},
+}
+
+#Enriquecer datos
+def enriquecer_dataframe(df, dicts=None):
+    """
+    Reemplaza los códigos por sus glosas como columnas categóricas: los códigos
+    quedan como arreglos enteros compactos y la glosa solo se decodifica al mostrar.
+    """
+    if dicts is None or dicts is obtener_tablas()['diccionarios']:
+        tablas = tablas_codigos()
+    else:
+        tablas = tablas_codigos(dicts)
+
+    for col, hoja in MAPEO_HOJAS.items():
         if col in df.columns:
-            df[col] = df[col].map(dicts['BULTO'])
+            df[col] = codificar_glosas(df[col], tablas[hoja])
 
     return df
+
+def capitulo_arancel(codigo_hs):
+    # ARANC_NAC tiene 8 dígitos; si llegó como número se perdió el cero inicial
+    texto = str(codigo_hs).strip()
+    if texto.endswith('.0'):
+        texto = texto[:-2]
+    if not texto.isdigit():
+        return -1
+    return int(texto.zfill(8)[:2])
+
+def agregar_section(df):
+    """
+    Agrega Chapter, HS Description y Section como columnas categóricas.
+    El capítulo se calcula una vez por arancel distinto y se traduce con los
+    arreglos de CATEGORIA_HS indexados por capítulo, sin merge.
+    """
+    if 'ARANC_NAC' not in df.columns:
+        return df
+
+    capitulos = aplicar_por_unicos(df['ARANC_NAC'], capitulo_arancel).to_numpy(dtype=np.int64)
+    conocido = capitulos >= 0
+    for col, tabla in obtener_tablas_capitulos().items():
+        codigos = np.full(len(capitulos), -1, dtype=np.int32)
+        codigos[conocido] = tabla['lookup'][capitulos[conocido]]
+        df[col] = pd.Categorical.from_codes(codigos, categories=tabla['categorias'])
+    return df
+
+def opciones_secciones(df):
+    """Opciones de los dropdowns de Section y HS Description presentes en el dataset."""
+    pares = df[['Section', 'HS Description']].drop_duplicates().dropna()
+    por_section = {
+        section: sorted(grupo['HS Description'].astype(str).unique())
+        for section, grupo in pares.groupby('Section', observed=True)
+    }
+    return {
+        'sections': sorted(df['Section'].dropna().astype(str).unique()),
+        'hsdesc': sorted(df['HS Description'].dropna().astype(str).unique()),
+        'hsdesc_por_section': por_section,
+    }
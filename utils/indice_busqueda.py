@@ -0,0 +1,151 @@
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from utils.helpers import eliminar_acentos, normalizar_texto
+
+
+# Columnas con buscador de términos separados por coma
+COLUMNAS_BUSQUEDA = ['PRODUCTO', 'NUM_UNICO_IMPORTADOR', 'PA_ORIG', 'PA_ADQ', 'CODCOMUN']
+
+# Caracteres con significado en regex: si aparecen, el término se evalúa como antes (regex)
+METACARACTERES_REGEX = set('.^$*+?{}[]\\|()')
+
+
+def clave_terminos(texto):
+    """
+    Términos de una búsqueda en forma canónica, para usar como clave de caché.
+    Solo los términos literales se pasan a minúsculas: en una regex la
+    mayúscula cambia el significado (\\d no es \\D).
+    """
+    terminos = {t.strip() for t in texto.split(',')}
+    return tuple(sorted({t if any(c in METACARACTERES_REGEX for c in t) else t.lower() for t in terminos}))
+
+
+class IndiceColumna:
+    """
+    Índice invertido de una columna de texto. Las filas se agrupan por valor
+    único (`codigos`) y cada token normalizado (minúsculas, sin acentos)
+    apunta a los valores únicos que lo contienen. Un término se resuelve sobre
+    el vocabulario y los valores únicos, y recién al final se proyecta a filas.
+    """
+
+    def __init__(self, serie, max_memo=256):
+        codigos, unicos = pd.factorize(serie)
+        self.codigos = codigos.astype(np.int32)
+        self.valores = np.asarray(unicos, dtype=object)
+        self.es_texto = np.array([isinstance(v, str) for v in self.valores], dtype=bool)
+        # Valores que no cambian al quitar acentos: para ellos el índice es exacto
+        self.estable = np.array(
+            [isinstance(v, str) and eliminar_acentos(v.lower()) == v.lower() for v in self.valores],
+            dtype=bool
+        )
+
+        postings = defaultdict(list)
+        for i, valor in enumerate(self.valores):
+            normalizado = normalizar_texto(valor)
+            if isinstance(normalizado, str):
+                for token in set(normalizado.split()):
+                    postings[token].append(i)
+        self.vocabulario = list(postings)
+        self.postings = {token: np.array(ids, dtype=np.int32) for token, ids in postings.items()}
+
+        self._memo = OrderedDict()
+        self._max_memo = max_memo
+        self._lock = threading.Lock()
+
+    def _unicos_con_parte(self, parte):
+        # Valores únicos con algún token que contiene `parte` como substring
+        with self._lock:
+            bitmap = self._memo.get(parte)
+            if bitmap is not None:
+                self._memo.move_to_end(parte)
+                return bitmap
+
+        bitmap = np.zeros(len(self.valores), dtype=bool)
+        for token in self.vocabulario:
+            if parte in token:
+                bitmap[self.postings[token]] = True
+
+        with self._lock:
+            self._memo[parte] = bitmap
+            if len(self._memo) > self._max_memo:
+                self._memo.popitem(last=False)
+        return bitmap
+
+    def _verificar(self, candidatos, patron):
+        # Confirma con la búsqueda original (regex, sin distinguir mayúsculas) sobre los candidatos
+        regex = re.compile(patron, re.IGNORECASE)
+        for i in np.flatnonzero(candidatos):
+            if not regex.search(self.valores[i]):
+                candidatos[i] = False
+        return candidatos
+
+    def _unicos_con_termino(self, termino):
+        normalizado = normalizar_texto(termino)
+        partes = normalizado.split()
+        if not partes:
+            # El término solo tiene caracteres que la normalización elimina
+            return self._verificar(self.es_texto.copy(), re.escape(termino))
+
+        candidatos = self._unicos_con_parte(partes[0]).copy()
+        for parte in partes[1:]:
+            candidatos &= self._unicos_con_parte(parte)
+
+        if len(partes) == 1 and normalizado == termino.lower():
+            # Solo hay falsos positivos en valores con acentos o caracteres no ASCII
+            revisar = candidatos & ~self.estable
+            candidatos &= self.estable
+            return candidatos | self._verificar(revisar, re.escape(termino))
+        return self._verificar(candidatos, re.escape(termino))
+
+    def unicos_que_coinciden(self, texto, dentro_de=None):
+        """
+        Mismo resultado que serie.str.contains('|'.join(terminos), case=False, na=False)
+        con terminos = texto separado por comas, pero a nivel de valores únicos.
+        Con `dentro_de` (bitmap de únicos) solo se revisan esos valores, sin
+        recorrer el vocabulario: sirve para refinar una búsqueda anterior.
+        """
+        terminos = [t.strip() for t in texto.split(',')]
+        if any(t == '' for t in terminos):
+            # Un término vacío en la regex coincide con cualquier texto
+            resultado = self.es_texto.copy()
+            return resultado & dentro_de if dentro_de is not None else resultado
+
+        if dentro_de is not None or any(c in METACARACTERES_REGEX for t in terminos for c in t):
+            try:
+                regex = re.compile('|'.join(terminos), re.IGNORECASE)
+            except re.error:
+                return np.zeros(len(self.valores), dtype=bool)
+            revisar = self.es_texto if dentro_de is None else self.es_texto & dentro_de
+            resultado = np.zeros(len(self.valores), dtype=bool)
+            for i in np.flatnonzero(revisar):
+                resultado[i] = bool(regex.search(self.valores[i]))
+            return resultado
+
+        resultado = np.zeros(len(self.valores), dtype=bool)
+        for termino in terminos:
+            resultado |= self._unicos_con_termino(termino)
+        return resultado
+
+    def proyectar(self, unicos):
+        """Pasa un bitmap de valores únicos a máscara booleana por fila."""
+        # El -1 de factorize (nulos) cae en el False agregado al final
+        return np.append(unicos, False)[self.codigos]
+
+    def mascara(self, texto):
+        """Máscara booleana por fila para el texto de búsqueda."""
+        return self.proyectar(self.unicos_que_coinciden(texto))
+
+
+class IndiceBusqueda:
+    """Índices de todas las columnas buscables de un dataset."""
+
+    def __init__(self, df, columnas=COLUMNAS_BUSQUEDA):
+        self.columnas = {col: IndiceColumna(df[col]) for col in columnas if col in df.columns}
+
+    def mascara(self, columna, texto):
+        return self.columnas[columna].mascara(texto)
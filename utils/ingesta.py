@@ -0,0 +1,377 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils.helpers import (
+    DESCRIPCION_PATH, DESCRIPCION_SHEET, agregar_section, aplicar_por_unicos, asignar_industria_serie,
+    cargar_descripcion_estructura, cargar_diccionarios, enriquecer_dataframe, ids_comunas, mapear_importadores
+)
+from utils.instrumentacion import capturar, medir_etapa, registrar_mediciones
+
+
+# Columnas del DIN que usa el dashboard
+COLUMNAS_SELECCION = [
+    'DD', 'NUM_UNICO_IMPORTADOR', 'ARANC_NAC', 'CIF_ITEM', 'PA_ORIG', 'PA_ADQ', 'TPO_CARGA', 'VIA_TRAN', 'TOT_BULTOS',
+    'TPO_BUL1', 'CANT_BUL1', 'TPO_BUL2', 'CANT_BUL2', 'DNOMBRE', 'DMARCA', 'DVARIEDAD', 'DOTRO1', 'DOTRO2',
+    'ATR_5', 'ATR_6', 'MEDIDA', 'CANT_MERC', 'CODCOMUN', 'ADU', 'PTO_DESEM', 'PTO_EMB', 'DESOBS1', 'TPO_DOCTO'
+]
+
+# Columnas que quedan como glosa después de enriquecer; se guardan como categóricas
+COLUMNAS_GLOSA = [
+    'PA_ORIG', 'PA_ADQ', 'VIA_TRAN', 'TPO_CARGA', 'CODCOMUN', 'ADU', 'PTO_DESEM', 'PTO_EMB', 'TPO_DOCTO',
+    'TPO_BUL1', 'TPO_BUL2', 'Industria'
+]
+
+# Filas por bloque en la lectura por streaming
+TAMANO_BLOQUE = 250_000
+
+# Procesos para parsear un TXT en paralelo y tamaño mínimo para que valga la pena repartirlo
+PROCESOS_INGESTA = int(os.environ.get('INGESTA_PROCESOS', os.cpu_count() or 1))
+MIN_BYTES_PARALELO = int(os.environ.get('INGESTA_MIN_BYTES_PARALELO', 64 * 1024 ** 2))
+
+
+# Columnas de texto con valores repetidos: se guardan como categóricas. En PRODUCTO
+# los códigos de la categórica son además los ids enteros del motor de rankings
+COLUMNAS_CATEGORICAS = ['NUM_UNICO_IMPORTADOR', 'ARANC_NAC', 'PRODUCTO']
+# Dígitos significativos que float32 representa sin perder la precisión declarada
+DIGITOS_FLOAT32 = 7
+
+
+def leer_estructura():
+    """Nombre, tipo, largo y precisión de cada columna del DIN, en el orden del archivo."""
+    df_descrip = pd.read_excel(DESCRIPCION_PATH, sheet_name=DESCRIPCION_SHEET, header=1)
+    df_descrip = df_descrip.dropna(subset=['CAMPO - DIN -  ENCABEZADO'])
+    return pd.DataFrame({
+        'nombre': df_descrip['CAMPO - DIN -  ENCABEZADO'].astype(str).str.strip().str.replace(' ', ''),
+        'tipo': df_descrip['tipo'].astype(str).str.strip().str.upper(),
+        'largo': pd.to_numeric(df_descrip['largo'], errors='coerce'),
+        'precision': pd.to_numeric(df_descrip['precision'], errors='coerce').fillna(0),
+    })
+
+
+def cargar_tipos_lectura():
+    """
+    Arma el dtype de lectura de cada columna a partir de la columna 'tipo' del
+    diccionario estructural: NUMBER -> float64, DATE y VARCHAR2 -> str.
+    El importador se lee como texto para poder cruzarlo con el RUT.
+    """
+    estructura = leer_estructura()
+    tipos = {
+        nombre: 'float64' if tipo == 'NUMBER' else 'str'
+        for nombre, tipo in zip(estructura['nombre'], estructura['tipo'])
+    }
+    tipos['NUM_UNICO_IMPORTADOR'] = 'str'
+    return tipos
+
+
+def _tipo_entero(largo):
+    if largo <= 2:
+        return 'Int8'
+    if largo <= 4:
+        return 'Int16'
+    if largo <= 9:
+        return 'Int32'
+    return 'Int64'
+
+
+def cargar_plan_tipos():
+    """
+    Dtype compacto de cada columna según 'tipo', 'largo' y 'precision' de la
+    estructura del DIN: NUMBER sin decimales -> entero nullable del menor
+    tamaño que alcanza, NUMBER con decimales -> float32 si el largo cabe en
+    su precisión y si no float64, y las columnas de COLUMNAS_CATEGORICAS ->
+    category. ARANC_NAC queda como categórica de códigos de 8 dígitos.
+    """
+    plan = {}
+    for fila in leer_estructura().itertuples(index=False):
+        if fila.tipo != 'NUMBER' or pd.isna(fila.largo):
+            continue
+        if fila.precision > 0:
+            plan[fila.nombre] = 'float32' if fila.largo <= DIGITOS_FLOAT32 else 'float64'
+        else:
+            plan[fila.nombre] = _tipo_entero(fila.largo)
+    for col in COLUMNAS_CATEGORICAS:
+        plan[col] = 'category'
+    return plan
+
+
+def _arancel_fijo(codigo):
+    # Código arancelario de ancho fijo: 8 dígitos con el cero inicial recuperado
+    texto = str(codigo).strip()
+    if texto.endswith('.0'):
+        texto = texto[:-2]
+    return texto.zfill(8) if texto.isdigit() else texto
+
+
+def aplicar_plan_tipos(df, plan):
+    """
+    Convierte las columnas del DataFrame ya enriquecido a los dtypes del plan.
+    Un entero que trae decimales se deja como float64 para no perder datos.
+    """
+    for col, tipo in plan.items():
+        if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if tipo == 'category':
+            serie = aplicar_por_unicos(df[col], _arancel_fijo) if col == 'ARANC_NAC' else df[col]
+            df[col] = serie.astype(object).astype('category')
+        elif tipo.startswith('Int'):
+            numeros = pd.to_numeric(df[col], errors='coerce')
+            if (numeros.dropna() % 1 == 0).all():
+                try:
+                    df[col] = numeros.astype(tipo)
+                except (TypeError, ValueError):
+                    # Valores más largos que lo declarado en la estructura
+                    df[col] = numeros
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(tipo)
+    return df
+
+
+def reporte_memoria(antes, despues):
+    """Imprime la memoria por columna antes y después del plan de tipos; retorna los totales."""
+    bytes_antes = antes.memory_usage(deep=True, index=False)
+    bytes_despues = despues.memory_usage(deep=True, index=False)
+    total_antes, total_despues = int(bytes_antes.sum()), int(bytes_despues.sum())
+    ahorro = 1 - total_despues / total_antes if total_antes else 0
+    print(f"🧮 Plan de tipos: {total_antes / 1024 ** 2:,.1f} MB -> {total_despues / 1024 ** 2:,.1f} MB ({ahorro:.0%} menos)")
+    for col in (bytes_antes - bytes_despues.reindex(bytes_antes.index, fill_value=0)).sort_values(ascending=False).index[:8]:
+        print(f"   {col:<22} {antes[col].dtype!s:>10} {bytes_antes[col] / 1024 ** 2:8.1f} MB -> "
+              f"{despues[col].dtype!s:>10} {bytes_despues[col] / 1024 ** 2:8.1f} MB")
+    return {'bytes_antes': total_antes, 'bytes_despues': total_despues}
+
+
+def iterar_txt_por_bloques(filepath, columnas=COLUMNAS_SELECCION, tamano_bloque=TAMANO_BLOQUE,
+                           delimiter=';', decimal=','):
+    """
+    Lee el TXT sin encabezado por bloques, solo con las columnas pedidas y
+    dtypes explícitos. `filepath` puede ser una ruta o un archivo binario abierto.
+    """
+    nombres = cargar_descripcion_estructura()
+    tipos = cargar_tipos_lectura()
+    lector = pd.read_csv(
+        filepath,
+        header=None,
+        names=nombres,
+        usecols=columnas,
+        dtype={col: tipos[col] for col in columnas if col in tipos},
+        delimiter=delimiter,
+        encoding='latin1',
+        decimal=decimal,
+        on_bad_lines='skip',
+        chunksize=tamano_bloque
+    )
+    with lector:
+        for bloque in lector:
+            yield bloque
+
+
+def parsear_fecha_din(serie):
+    # DD viene como DDMMYYYY; zfill recupera el cero inicial si se perdió
+    return pd.to_datetime(serie.astype(str).str.strip().str.zfill(8), format='%d%m%Y', errors='coerce')
+
+
+def preparar_dataframe(df, dicts=None):
+    """
+    Pipeline común a todos los lectores: mapea importadores, arma PRODUCTO,
+    asigna industria y capítulo HS y enriquece los códigos con sus glosas.
+    """
+    if dicts is None:
+        dicts = cargar_diccionarios()
+
+    with medir_etapa('ingesta:importadores', filas=len(df)):
+        df['NUM_UNICO_IMPORTADOR'] = mapear_importadores(df['NUM_UNICO_IMPORTADOR'])
+
+    select_df = df[COLUMNAS_SELECCION].copy()
+
+    select_df['PRODUCTO'] = (
+        select_df['DNOMBRE'].fillna('') + ' ' +
+        select_df['DMARCA'].fillna('') + ' ' +
+        select_df['DVARIEDAD'].fillna('') + ' ' +
+        select_df['DOTRO1'].fillna('') + ' ' +
+        select_df['DOTRO2'].fillna('') + ' ' +
+        select_df['ATR_5'].fillna('') + ' ' +
+        select_df['ATR_6'].fillna('')
+    )
+
+    with medir_etapa('ingesta:enriquecer', filas=len(select_df)):
+        select_df['Industria'] = asignar_industria_serie(select_df['ARANC_NAC'])
+        select_df = enriquecer_dataframe(select_df, dicts)
+    with medir_etapa('ingesta:section', filas=len(select_df)):
+        select_df = agregar_section(select_df)
+    # Comuna del importador resuelta a su fila de comunas.csv: el mapa no cruza por nombre en cada callback
+    with medir_etapa('ingesta:comunas', filas=len(select_df)):
+        select_df['COMUNA_ID'] = ids_comunas(select_df['CODCOMUN'])
+    select_df = select_df.drop(columns=['DNOMBRE', 'DMARCA', 'DVARIEDAD'])
+    return select_df
+
+
+def _compactar(df):
+    for col in COLUMNAS_GLOSA:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            # object antes de category para que todos los bloques tengan categorías del mismo tipo
+            df[col] = df[col].astype(object).astype('category')
+    return df
+
+
+def concatenar_bloques(bloques):
+    """Concatena bloques ya procesados conservando las columnas categóricas."""
+    if len(bloques) == 1:
+        return bloques[0]
+
+    categoricas = [
+        col for col in bloques[0].columns
+        if isinstance(bloques[0][col].dtype, pd.CategoricalDtype)
+    ]
+    unidas = {col: union_categoricals([b[col] for b in bloques]) for col in categoricas}
+    df = pd.concat([b.drop(columns=categoricas) for b in bloques], ignore_index=True)
+    for col, valores in unidas.items():
+        df[col] = valores
+    return df[bloques[0].columns]
+
+
+def _medir_lectura(bloques):
+    # La lectura ocurre al pedir cada bloque al iterador: se mide ahí
+    iterador = iter(bloques)
+    while True:
+        with medir_etapa('ingesta:lectura') as medicion:
+            bloque = next(iterador, None)
+            medicion['filas'] = len(bloque) if bloque is not None else 0
+        if bloque is None:
+            return
+        yield bloque
+
+
+def procesar_txt_por_bloques(filepath, tamano_bloque=TAMANO_BLOQUE, validar=None, progreso=None):
+    """
+    Ingesta por streaming: cada bloque se parsea, se le convierte la fecha,
+    pasa por el pipeline y se compacta antes de pasar al siguiente, así el
+    pico de memoria depende del tamaño de bloque y no del archivo.
+    `validar` recibe el primer bloque crudo (por ejemplo validar_df) y
+    `progreso(etapa, filas)` se llama al pasar por cada etapa.
+    """
+    if progreso is None:
+        progreso = lambda etapa, filas: None  # noqa: E731
+    dicts = cargar_diccionarios()
+    plan = cargar_plan_tipos()
+    bloques = []
+    filas = 0
+    progreso('leyendo', filas)
+    for i, bloque in enumerate(_medir_lectura(iterar_txt_por_bloques(filepath, tamano_bloque=tamano_bloque))):
+        if i == 0 and validar is not None:
+            progreso('validando', filas)
+            with medir_etapa('ingesta:validar', filas=len(bloque)):
+                validar(bloque)
+        progreso('enriqueciendo', filas)
+        with medir_etapa('ingesta:fechas', filas=len(bloque)):
+            bloque['DD'] = parsear_fecha_din(bloque['DD'])
+        preparado = _compactar(preparar_dataframe(bloque, dicts))
+        with medir_etapa('ingesta:plan_tipos', filas=len(preparado)):
+            if i == 0:
+                antes = preparado.copy()
+                bloques.append(aplicar_plan_tipos(preparado, plan))
+                reporte_memoria(antes, preparado)
+                del antes
+            else:
+                bloques.append(aplicar_plan_tipos(preparado, plan))
+        filas += len(bloque)
+        print(f"📦 Bloque {i + 1} procesado ({len(bloque):,} filas)")
+        progreso('leyendo', filas)
+
+    if not bloques:
+        return pd.DataFrame(columns=COLUMNAS_SELECCION)
+    with medir_etapa('ingesta:concatenar', filas=filas):
+        return concatenar_bloques(bloques)
+
+
+class _RangoArchivo(io.RawIOBase):
+    """Vista de solo lectura de los bytes [inicio, fin) de un archivo."""
+
+    def __init__(self, ruta, inicio, fin):
+        self._archivo = open(ruta, 'rb')
+        self._archivo.seek(inicio)
+        self._restante = fin - inicio
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        n = min(len(destino), self._restante)
+        if n <= 0:
+            return 0
+        datos = self._archivo.read(n)
+        destino[:len(datos)] = datos
+        self._restante -= len(datos)
+        return len(datos)
+
+    def close(self):
+        self._archivo.close()
+        super().close()
+
+
+def dividir_en_rangos(filepath, partes):
+    """
+    Divide el archivo en `partes` rangos de bytes de tamaño parecido, con cada
+    corte movido al siguiente salto de línea para no partir una fila.
+    """
+    tamano = os.path.getsize(filepath)
+    cortes = [0]
+    with open(filepath, 'rb') as archivo:
+        for k in range(1, partes):
+            archivo.seek(max(tamano * k // partes, cortes[-1]))
+            archivo.readline()
+            corte = archivo.tell()
+            if cortes[-1] < corte < tamano:
+                cortes.append(corte)
+    cortes.append(tamano)
+    return list(zip(cortes[:-1], cortes[1:]))
+
+
+def _procesar_rango(filepath, inicio, fin, tamano_bloque, validar=None):
+    # Corre en un proceso del pool: mismo pipeline por bloques, sobre un pedazo del archivo.
+    # Las mediciones viajan con el resultado para sumarlas en el proceso que reparte
+    with capturar() as mediciones, io.BufferedReader(_RangoArchivo(filepath, inicio, fin)) as rango:
+        parte = procesar_txt_por_bloques(rango, tamano_bloque=tamano_bloque, validar=validar)
+    return parte, mediciones
+
+
+def procesar_txt_en_paralelo(filepath, procesos=PROCESOS_INGESTA, tamano_bloque=TAMANO_BLOQUE,
+                             validar=None, progreso=None):
+    """
+    Parte el TXT en rangos de bytes alineados a fin de línea y corre el pipeline
+    de cada rango en un proceso distinto; los resultados se concatenan en orden.
+    Archivos chicos (o procesos=1) van por procesar_txt_por_bloques directo.
+    `validar` debe poder enviarse a otro proceso (functools.partial, no lambda).
+    """
+    if procesos <= 1 or os.path.getsize(filepath) < MIN_BYTES_PARALELO:
+        return procesar_txt_por_bloques(filepath, tamano_bloque, validar=validar, progreso=progreso)
+
+    if progreso is None:
+        progreso = lambda etapa, filas: None  # noqa: E731
+    rangos = dividir_en_rangos(filepath, procesos)
+    print(f"🧮 Parseando {filepath} en {len(rangos)} partes")
+    progreso('leyendo', 0)
+
+    partes = [None] * len(rangos)
+    filas = 0
+    with ProcessPoolExecutor(max_workers=min(procesos, len(rangos))) as pool:
+        futuros = {
+            # Solo el primer rango valida: es el que trae las primeras filas del archivo
+            pool.submit(_procesar_rango, filepath, inicio, fin, tamano_bloque, validar if i == 0 else None): i
+            for i, (inicio, fin) in enumerate(rangos)
+        }
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            partes[i], mediciones = futuro.result()
+            registrar_mediciones(mediciones)
+            filas += len(partes[i])
+            progreso('enriqueciendo', filas)
+            print(f"📦 Parte {i + 1}/{len(rangos)} procesada ({len(partes[i]):,} filas)")
+
+    partes = [parte for parte in partes if len(parte)]
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS_SELECCION)
+    with medir_etapa('ingesta:concatenar', filas=filas):
+        return concatenar_bloques([_compactar(parte) for parte in partes])
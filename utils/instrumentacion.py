@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Mediciones recientes que se conservan para /metrics
+MAX_MEDICIONES = int(os.environ.get('METRICAS_MAX_RECIENTES', 500))
+# Con tracemalloc la memoria por etapa es exacta, pero todas las asignaciones se vuelven más lentas
+USAR_TRACEMALLOC = os.environ.get('METRICAS_TRACEMALLOC', '0') == '1'
+
+_lock = threading.Lock()
+_recientes = deque(maxlen=MAX_MEDICIONES)
+_acumulado = {}  # etapa -> totales
+_local = threading.local()  # capturas activas del hilo (trazas por request, trabajos en otros procesos)
+
+if USAR_TRACEMALLOC and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def _pico_memoria():
+    # Pico de memoria del proceso en bytes: ru_maxrss viene en KB en Linux
+    if USAR_TRACEMALLOC:
+        return tracemalloc.get_traced_memory()[1]
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return None
+
+
+def _acumular(medicion):
+    totales = _acumulado.setdefault(medicion['etapa'], {
+        'llamadas': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'wall_max_s': 0.0, 'filas': 0, 'memoria_pico_max': 0,
+    })
+    totales['llamadas'] += 1
+    totales['wall_s'] += medicion['wall_s']
+    totales['cpu_s'] += medicion['cpu_s']
+    totales['wall_max_s'] = max(totales['wall_max_s'], medicion['wall_s'])
+    totales['filas'] += medicion['filas'] or 0
+    totales['memoria_pico_max'] = max(totales['memoria_pico_max'], medicion['memoria_pico'] or 0)
+
+
+def registrar_mediciones(mediciones):
+    """Suma mediciones hechas en otro proceso (por ejemplo un trabajo de ingesta)."""
+    with _lock:
+        for medicion in mediciones:
+            _recientes.append(medicion)
+            _acumular(medicion)
+    for captura in getattr(_local, 'capturas', []):
+        captura.extend(mediciones)
+
+
+@contextmanager
+def medir_etapa(etapa, filas=None):
+    """
+    Mide una etapa: tiempo de pared, tiempo de CPU del hilo, aumento del pico
+    de memoria del proceso y filas. Quien mide puede completar las filas al
+    terminar con `medicion['filas'] = len(df)`.
+    """
+    medicion = {'etapa': etapa, 'filas': filas}
+    pico_antes = _pico_memoria()
+    if USAR_TRACEMALLOC:
+        tracemalloc.reset_peak()
+        pico_antes = tracemalloc.get_traced_memory()[0]
+    inicio, cpu_inicio = time.perf_counter(), time.thread_time()
+    try:
+        yield medicion
+    finally:
+        medicion['wall_s'] = time.perf_counter() - inicio
+        medicion['cpu_s'] = time.thread_time() - cpu_inicio
+        pico_despues = _pico_memoria()
+        medicion['memoria_pico'] = (
+            max(pico_despues - pico_antes, 0) if pico_antes is not None and pico_despues is not None else None
+        )
+        medicion['fin'] = time.time()
+        registrar_mediciones([medicion])
+
+
+def iniciar_captura():
+    """Empieza a juntar en una lista las mediciones que haga este hilo."""
+    mediciones = []
+    capturas = getattr(_local, 'capturas', None)
+    if capturas is None:
+        capturas = _local.capturas = []
+    capturas.append(mediciones)
+    return mediciones
+
+
+def terminar_captura(mediciones):
+    capturas = getattr(_local, 'capturas', [])
+    # Por identidad: otra captura con el mismo contenido (p. ej. vacía) no es esta
+    for posicion in range(len(capturas) - 1, -1, -1):
+        if capturas[posicion] is mediciones:
+            del capturas[posicion]
+            break
+    return mediciones
+
+
+@contextmanager
+def capturar():
+    """Junta en una lista las mediciones hechas por este hilo mientras dure el bloque."""
+    mediciones = iniciar_captura()
+    try:
+        yield mediciones
+    finally:
+        terminar_captura(mediciones)
+
+
+def resumen_metricas():
+    """Totales por etapa y las mediciones más recientes."""
+    with _lock:
+        etapas = {
+            etapa: dict(totales, wall_promedio_s=totales['wall_s'] / totales['llamadas'])
+            for etapa, totales in _acumulado.items()
+        }
+        return {'etapas': etapas, 'recientes': list(_recientes)}
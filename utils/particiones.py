@@ -0,0 +1,142 @@
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from utils.cache_procesados import PARQUET_DISPONIBLE
+from utils.ingesta import concatenar_bloques
+
+
+# Datos de cada sesión, particionados por mes: cache/sesiones/<sesion>/<AAAA-MM>/<clave del upload>.parquet
+CARPETA_SESIONES = os.path.join('cache', 'sesiones')
+# Horas sin uso tras las que se borran las particiones de una sesión
+MAX_HORAS_SESION = float(os.environ.get('SESIONES_MAX_HORAS', 24))
+
+EXTENSIONES = ('.parquet', '.pkl')
+
+
+class SesionInvalida(ValueError):
+    pass
+
+
+def es_id_sesion(valor):
+    # uuid4().hex generado por el layout en cada carga de la página. Un id fijo (como el
+    # 'auto' de dash-uploader) mezclaría las particiones de todos los navegadores
+    return isinstance(valor, str) and len(valor) == 32 and all(c in '0123456789abcdef' for c in valor)
+
+
+def _carpeta_sesion(session_id):
+    if not es_id_sesion(session_id):
+        raise SesionInvalida(f"Id de sesión inválido: {session_id!r}")
+    return os.path.join(CARPETA_SESIONES, session_id)
+
+
+def _guardar_particion(df, ruta_base):
+    if PARQUET_DISPONIBLE:
+        try:
+            df.to_parquet(ruta_base + '.parquet.tmp', index=False)
+            os.replace(ruta_base + '.parquet.tmp', ruta_base + '.parquet')
+            return
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la partición en Parquet ({e}), se usa pickle")
+    df.to_pickle(ruta_base + '.pkl.tmp', compression=None)
+    os.replace(ruta_base + '.pkl.tmp', ruta_base + '.pkl')
+
+
+def _leer_particion(ruta, columnas=None):
+    if ruta.endswith('.parquet'):
+        # Parquet es columnar: solo se leen las columnas pedidas
+        return pd.read_parquet(ruta, columns=columnas)
+    df = pd.read_pickle(ruta)
+    return df if columnas is None else df[columnas]
+
+
+def agregar_a_sesion(session_id, df, clave):
+    """
+    Agrega un upload procesado a las particiones mensuales de la sesión. Cada
+    archivo de partición se nombra con la clave del upload, así subir dos veces
+    el mismo archivo reemplaza sus filas en vez de duplicarlas.
+    Retorna los meses ('AAAA-MM') que tocó el upload.
+    """
+    limpiar_sesiones_antiguas()
+    carpeta = _carpeta_sesion(session_id)
+    meses = df['DD'].dt.to_period('M')
+    tocados = []
+    for mes, filas in df.groupby(meses, observed=True, sort=True).indices.items():
+        nombre_mes = str(mes)
+        os.makedirs(os.path.join(carpeta, nombre_mes), exist_ok=True)
+        _guardar_particion(df.iloc[filas].reset_index(drop=True), os.path.join(carpeta, nombre_mes, clave))
+        tocados.append(nombre_mes)
+    os.utime(carpeta)
+    print(f"🗃️ Sesión {session_id}: upload {clave[:12]} en {len(tocados)} particiones mensuales")
+    return tocados
+
+
+def meses_sesion(session_id):
+    """Meses ('AAAA-MM') con datos en la sesión, ordenados."""
+    if not es_id_sesion(session_id):
+        return []
+    carpeta = _carpeta_sesion(session_id)
+    if not os.path.isdir(carpeta):
+        return []
+    return sorted(
+        nombre for nombre in os.listdir(carpeta)
+        if os.path.isdir(os.path.join(carpeta, nombre))
+    )
+
+
+def meses_en_rango(meses, inicio=None, fin=None):
+    """Meses de la lista que se cruzan con el rango de fechas [inicio, fin]."""
+    desde = pd.Timestamp(inicio).to_period('M') if inicio is not None else None
+    hasta = pd.Timestamp(fin).to_period('M') if fin is not None else None
+    return [
+        mes for mes in meses
+        if (desde is None or pd.Period(mes, 'M') >= desde) and (hasta is None or pd.Period(mes, 'M') <= hasta)
+    ]
+
+
+def rango_sesion(session_id):
+    """Primera y última fecha con datos en la sesión (lee solo las particiones de los extremos)."""
+    meses = meses_sesion(session_id)
+    if not meses:
+        return None, None
+    primero = leer_sesion(session_id, meses=meses[:1], columnas=['DD'])
+    ultimo = primero if len(meses) == 1 else leer_sesion(session_id, meses=meses[-1:], columnas=['DD'])
+    return primero['DD'].min(), ultimo['DD'].max()
+
+
+def leer_sesion(session_id, inicio=None, fin=None, meses=None, columnas=None):
+    """
+    Lee las filas de la sesión. El rango de fechas se usa para descartar
+    particiones antes de leerlas: solo se abren los meses que se cruzan con
+    [inicio, fin]. Con `meses` se leen exactamente esos meses y con
+    `columnas`, solo esas columnas.
+    """
+    if meses is None:
+        meses = meses_en_rango(meses_sesion(session_id), inicio, fin)
+    carpeta = _carpeta_sesion(session_id)
+
+    partes = []
+    for mes in meses:
+        carpeta_mes = os.path.join(carpeta, mes)
+        if not os.path.isdir(carpeta_mes):
+            continue
+        for nombre in sorted(os.listdir(carpeta_mes)):
+            if nombre.endswith(EXTENSIONES):
+                partes.append(_leer_particion(os.path.join(carpeta_mes, nombre), columnas))
+
+    if not partes:
+        return pd.DataFrame()
+    return concatenar_bloques(partes)
+
+
+def limpiar_sesiones_antiguas(max_horas=MAX_HORAS_SESION):
+    if not os.path.isdir(CARPETA_SESIONES):
+        return
+    ahora = time.time()
+    for nombre in os.listdir(CARPETA_SESIONES):
+        carpeta = os.path.join(CARPETA_SESIONES, nombre)
+        if os.path.isdir(carpeta) and ahora - os.path.getmtime(carpeta) > max_horas * 3600:
+            shutil.rmtree(carpeta, ignore_errors=True)
+            print(f"🧹 Particiones de la sesión {nombre} eliminadas")
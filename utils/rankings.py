@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+
+def ids_producto(df):
+    """
+    Id entero de PRODUCTO por fila y los productos de cada id. Desde la
+    ingesta PRODUCTO es categórica: los códigos ya son los ids y se conservan
+    al filtrar, así que no hay que hashear el texto en cada callback.
+    """
+    producto = df['PRODUCTO']
+    if isinstance(producto.dtype, pd.CategoricalDtype):
+        return producto.cat.codes.to_numpy(), producto.cat.categories.to_numpy(dtype=object)
+    # Datos guardados antes de que PRODUCTO fuera categórica
+    codigos, unicos = pd.factorize(producto)
+    return codigos, np.asarray(unicos, dtype=object)
+
+
+def top_k(valores, k):
+    """
+    Posiciones de los k mayores de `valores`, de mayor a menor (empates por
+    posición). Selección parcial con argpartition: O(n) más el orden de los k.
+    """
+    k = min(k, len(valores))
+    if k == 0:
+        return np.array([], dtype=np.int64)
+    if k < len(valores):
+        candidatos = np.argpartition(-valores, k - 1)[:k]
+    else:
+        candidatos = np.arange(len(valores))
+    return candidatos[np.lexsort((candidatos, -valores[candidatos]))]
+
+
+def _agregados(df):
+    # Solo los productos presentes en las filas: el costo no depende de cuántas
+    # categorías tenga PRODUCTO en todo el dataset
+    ids, productos = ids_producto(df)
+    validos = ids >= 0
+    presentes, posicion = np.unique(ids[validos], return_inverse=True)
+    conteo = np.bincount(posicion, minlength=len(presentes))
+    cif = np.bincount(
+        posicion,
+        weights=np.nan_to_num(df['CIF_ITEM'].to_numpy(dtype=np.float64, na_value=np.nan)[validos]),
+        minlength=len(presentes)
+    )
+    return ids, presentes, productos[presentes], conteo, cif
+
+
+def top_productos_por_conteo(df, k=20):
+    """Productos con más transacciones en las filas de `df`: columnas Producto y Conteo."""
+    _, _, productos, conteo, _ = _agregados(df)
+    elegidos = top_k(conteo, k)
+    return pd.DataFrame({'Producto': productos[elegidos], 'Conteo': conteo[elegidos]})
+
+
+def top_productos_por_cif(df, k=20):
+    """
+    Productos con mayor suma de CIF_ITEM y la última fecha de cada uno:
+    columnas Producto, Total CIF_ITEM y Fecha. La fecha máxima se calcula
+    solo sobre las filas de los k productos elegidos.
+    """
+    ids, presentes, productos, _, cif = _agregados(df)
+    elegidos = top_k(cif, k)
+
+    filas = np.isin(ids, presentes[elegidos])
+    fechas = pd.Series(df['DD'].to_numpy()[filas]).groupby(ids[filas]).max()
+    return pd.DataFrame({
+        'Producto': productos[elegidos],
+        'Total CIF_ITEM': cif[elegidos],
+        'Fecha': fechas.reindex(presentes[elegidos]).to_numpy(),
+    })
@@ -0,0 +1,96 @@
+import os
+import zlib
+
+import numpy as np
+
+
+# Cantidad máxima de rutas dibujadas (las de más transacciones) y puntos por curva
+MAX_RUTAS = int(os.environ.get('RUTAS_MAX', 500))
+PUNTOS_POR_CURVA = int(os.environ.get('RUTAS_PUNTOS_CURVA', 50))
+
+# Paleta fija: cada ruta cae siempre en el mismo color, así la figura es cacheable
+PALETA_RUTAS = [
+    '#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A',
+    '#19D3F3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52',
+]
+
+
+def color_ruta(embarque, desembarque, paleta=PALETA_RUTAS):
+    """Índice de color estable para una ruta (no depende del orden ni de la sesión)."""
+    return zlib.crc32(f'{embarque}|{desembarque}'.encode('utf-8')) % len(paleta)
+
+
+def calcular_curvas(lat1, lon1, lat2, lon2, num_puntos=PUNTOS_POR_CURVA):
+    """
+    Puntos de todas las curvas en un solo cálculo. Recibe arrays de largo n con
+    los extremos de cada ruta y retorna latitudes y longitudes planas de largo
+    n * (num_puntos + 1), con un NaN al final de cada curva para cortar la línea.
+    """
+    lat1, lon1, lat2, lon2 = (np.asarray(v, dtype=float)[:, None] for v in (lat1, lon1, lat2, lon2))
+    t = np.linspace(0, 1, num_puntos)[None, :]
+    curvatura = np.sin(t * np.pi) * 0.5
+
+    latitudes = lat1 + t * (lat2 - lat1)
+    longitudes = lon1 + t * (lon2 - lon1) + curvatura * (lon2 - lon1)
+
+    corte = np.full((len(latitudes), 1), np.nan)
+    return (
+        np.hstack([latitudes, corte]).ravel(),
+        np.hstack([longitudes, corte]).ravel(),
+    )
+
+
+def figura_rutas(puertos_stats, max_rutas=MAX_RUTAS, num_puntos=PUNTOS_POR_CURVA, paleta=PALETA_RUTAS):
+    """
+    Mapa de movimiento entre puertos. `puertos_stats` trae una fila por ruta con
+    las coordenadas de embarque y desembarque. Las curvas se agrupan en una
+    traza por color de la paleta en vez de una traza por ruta.
+    """
+    import plotly.graph_objects as go
+
+    rutas = puertos_stats
+    if max_rutas and len(rutas) > max_rutas:
+        rutas = rutas.nlargest(max_rutas, 'Número de Transacciones')
+
+    fig_puertos = go.Figure()
+
+    # Puntos de embarque
+    fig_puertos.add_trace(go.Scattermapbox(
+        lat=rutas['Latitud_emb'],
+        lon=rutas['Longitud_emb'],
+        mode='markers',
+        marker=go.scattermapbox.Marker(size=12, color='blue'),
+        text=rutas['Puerto de Embarque'],
+        name='Embarque'
+    ))
+
+    # Líneas entre puertos, una traza por color
+    colores = np.array([
+        color_ruta(emb, desem, paleta)
+        for emb, desem in zip(rutas['Puerto de Embarque'], rutas['Puerto de Desembarque'])
+    ], dtype=int)
+    for indice in np.unique(colores):
+        grupo = rutas[colores == indice]
+        latitudes, longitudes = calcular_curvas(
+            grupo['Latitud_emb'], grupo['Longitud_emb'],
+            grupo['Latitud_desem'], grupo['Longitud_desem'],
+            num_puntos=num_puntos
+        )
+        fig_puertos.add_trace(go.Scattermapbox(
+            lat=latitudes,
+            lon=longitudes,
+            mode='lines',
+            line=dict(width=2, color=paleta[indice]),
+            hoverinfo='none',
+            showlegend=False
+        ))
+
+    fig_puertos.update_layout(
+        mapbox_style="open-street-map",
+        mapbox_center={"lat": -33.45, "lon": -70.65},
+        mapbox_zoom=1.5,
+        height=800,
+        title="Mapa de Movimiento entre Puertos",
+        template='plotly_dark'
+    )
+    return fig_puertos
@@ -0,0 +1,324 @@
+import functools
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from utils.almacen_datasets import obtener_artefacto, registrar_dataset
+from utils.cache_procesados import cargar_procesado, clave_archivo, guardar_procesado
+from utils.cubo import CuboMensual
+from utils.explorador import IndiceOrden
+from utils.helpers import opciones_secciones
+from utils.indice_busqueda import IndiceBusqueda
+from utils.ingesta import (
+    COLUMNAS_SELECCION, aplicar_plan_tipos, cargar_plan_tipos, preparar_dataframe, procesar_txt_en_paralelo
+)
+from utils.instrumentacion import capturar, medir_etapa, registrar_mediciones
+from utils.particiones import agregar_a_sesion, es_id_sesion, leer_sesion, rango_sesion
+from validator import validar_df
+
+
+# Procesos que procesan uploads en paralelo (cada uno puede ocupar varios GB con archivos grandes)
+PROCESOS_TRABAJOS = int(os.environ.get('TRABAJOS_PROCESOS', 2))
+# Trabajos terminados que se conservan en la tabla para que el navegador lea el resultado
+MAX_TRABAJOS = int(os.environ.get('TRABAJOS_MAX', 100))
+# Estado de cada trabajo en disco: con varios workers el polling puede llegar a otro proceso
+CARPETA_TRABAJOS = os.path.join('cache', 'trabajos')
+MAX_HORAS_TRABAJOS = float(os.environ.get('TRABAJOS_MAX_HORAS', 24))
+
+# Etapas por las que pasa un trabajo, en orden
+ETAPAS = ['en_cola', 'leyendo', 'validando', 'enriqueciendo', 'indexando', 'listo']
+MENSAJES_ETAPA = {
+    'en_cola': "⏳ En cola",
+    'leyendo': "📥 Leyendo archivo",
+    'validando': "🔍 Validando columnas",
+    'enriqueciendo': "🧩 Enriqueciendo con diccionarios",
+    'indexando': "🗂️ Armando índices",
+    'listo': "✅ Dataset listo",
+    'error': "❌ Error",
+}
+
+_lock = threading.Lock()
+_trabajos = OrderedDict()  # trabajo_id -> {'etapa', 'filas', 'archivos', 'pendientes', 'parciales', 'error', 'resultado', ...}
+_pool = None
+_indexador = None
+_manager = None
+_progreso = None  # dict compartido con los procesos: (trabajo_id, n° de archivo) -> (etapa, filas)
+
+
+class ErrorIngesta(ValueError):
+    pass
+
+
+def procesar_archivo(filepath, progreso=None):
+    """
+    Pipeline de ingesta de un upload (CSV o TXT del DIN). Retorna la clave del
+    archivo y el DataFrame procesado, desde el caché si el mismo archivo ya se
+    procesó. Lanza ErrorIngesta con un mensaje para el usuario si el archivo no sirve.
+    """
+    if progreso is None:
+        progreso = lambda etapa, filas: None  # noqa: E731
+
+    # Un archivo ya procesado (mismo contenido) se carga directo desde el caché
+    clave = clave_archivo(filepath)
+    select_df = cargar_procesado(clave)
+    if select_df is not None:
+        print("⚡ Se omite el pipeline de ingesta")
+        return clave, select_df
+
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == '.csv':
+        progreso('leyendo', 0)
+        with medir_etapa('ingesta:lectura') as medicion:
+            df = pd.read_csv(filepath)
+            medicion['filas'] = len(df)
+        progreso('enriqueciendo', len(df))
+        select_df = preparar_dataframe(df)
+        select_df['DD'] = pd.to_datetime(select_df['DD'], format='%Y-%m-%d')
+        select_df = aplicar_plan_tipos(select_df, cargar_plan_tipos())
+    elif ext == '.txt':
+        try:
+            # Lectura por bloques, repartida en varios procesos si el archivo es grande
+            select_df = procesar_txt_en_paralelo(
+                filepath,
+                validar=functools.partial(validar_df, columnas_esperadas=COLUMNAS_SELECCION),
+                progreso=progreso
+            )
+        except Exception as e:
+            print(f"❌ Error al leer TXT: {e}")
+            raise ErrorIngesta(f"No se pudo leer el TXT: {e}")
+
+        if select_df['DD'].isna().all():
+            print("⚠️ Todas las fechas en 'DD' son inválidas o no se pudieron convertir.")
+            raise ErrorIngesta("Todas las fechas en 'DD' son inválidas o no se pudieron convertir.")
+    else:
+        raise ErrorIngesta(f"Extensión no soportada: {ext}")
+
+    guardar_procesado(clave, select_df)
+    return clave, select_df
+
+
+def _ejecutar(trabajo_id, numero, filepath, progreso_compartido):
+    # Corre en un proceso del pool: reporta cada etapa en el dict compartido
+    def progreso(etapa, filas):
+        progreso_compartido[(trabajo_id, numero)] = (etapa, filas)
+        # También en disco: el polling puede llegar a un worker sin acceso a este dict
+        _escribir_json(_ruta_avance(trabajo_id, numero), [etapa, filas])
+
+    # Las mediciones se hacen en este proceso: viajan con el resultado para /metrics
+    with capturar() as mediciones:
+        with medir_etapa('procesar_archivo') as medicion:
+            clave, df = procesar_archivo(filepath, progreso)
+            medicion['filas'] = len(df)
+    return clave, df, mediciones
+
+
+def _iniciar():
+    global _pool, _indexador, _manager, _progreso
+    if _pool is None:
+        _manager = multiprocessing.Manager()
+        _progreso = _manager.dict()
+        _pool = ProcessPoolExecutor(max_workers=PROCESOS_TRABAJOS)
+        # La etapa de índices corre en el proceso del servidor, donde vive el almacén de datasets
+        _indexador = ThreadPoolExecutor(max_workers=1)
+
+
+def _ruta_trabajo(trabajo_id):
+    return os.path.join(CARPETA_TRABAJOS, f'{trabajo_id}.json')
+
+
+def _ruta_avance(trabajo_id, numero):
+    # Avance de un archivo del trabajo, escrito por el proceso del pool que lo procesa
+    return os.path.join(CARPETA_TRABAJOS, f'{trabajo_id}-{numero}.json')
+
+
+def _escribir_json(ruta, datos):
+    temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        os.makedirs(CARPETA_TRABAJOS, exist_ok=True)
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, default=str)
+        os.replace(temporal, ruta)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar {ruta}: {e}")
+
+
+def _leer_json(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _persistir(trabajo_id, trabajo):
+    # Lo que necesita estado_trabajo en otro worker: sin los DataFrames parciales
+    _escribir_json(_ruta_trabajo(trabajo_id), {k: v for k, v in trabajo.items() if k != 'parciales'})
+
+
+def _leer_persistido(trabajo_id):
+    # El id viene del navegador: solo se aceptan ids generados por encolar_upload
+    if not isinstance(trabajo_id, str) or len(trabajo_id) != 32 or any(c not in '0123456789abcdef' for c in trabajo_id):
+        return None
+    return _leer_json(_ruta_trabajo(trabajo_id))
+
+
+def _avance(trabajo_id, numero):
+    # Del dict compartido si el trabajo es de este worker; si no, de su archivo de avance
+    avance = _progreso.get((trabajo_id, numero)) if _progreso is not None else None
+    if avance is None:
+        avance = _leer_json(_ruta_avance(trabajo_id, numero))
+    return tuple(avance) if avance else None
+
+
+def _limpiar_persistidos(max_horas=MAX_HORAS_TRABAJOS):
+    if not os.path.isdir(CARPETA_TRABAJOS):
+        return
+    ahora = time.time()
+    for nombre in os.listdir(CARPETA_TRABAJOS):
+        ruta = os.path.join(CARPETA_TRABAJOS, nombre)
+        try:
+            if ahora - os.path.getmtime(ruta) > max_horas * 3600:
+                os.remove(ruta)
+        except OSError:
+            pass
+
+
+def _actualizar(trabajo_id, **campos):
+    with _lock:
+        trabajo = _trabajos.get(trabajo_id)
+        if trabajo is not None:
+            trabajo.update(campos)
+            _persistir(trabajo_id, trabajo)
+
+
+def _indexar(trabajo_id, parciales, session_id):
+    try:
+        filas = sum(len(df) for _, df in parciales)
+        _actualizar(trabajo_id, etapa='indexando', filas=filas)
+        with medir_etapa('indexar', filas=filas):
+            if es_id_sesion(session_id):
+                # Cada upload se suma a las particiones mensuales de la sesión; el dataset
+                # activo son todos los datos de la sesión en los meses recién subidos
+                meses = set()
+                for clave, df in parciales:
+                    meses.update(agregar_a_sesion(session_id, df, clave))
+                meses = sorted(meses)
+                df = leer_sesion(session_id, meses=meses)
+                min_date, max_date = rango_sesion(session_id)
+            else:
+                # Sin una sesión propia del navegador no se mezcla nada en particiones compartidas
+                session_id, meses = None, []
+                df = pd.concat([df for _, df in parciales], ignore_index=True)
+                min_date, max_date = df['DD'].min(), df['DD'].max()
+
+            # El DataFrame queda en el servidor; al navegador solo viaja el handle
+            handle = registrar_dataset(df, session_id=session_id, meses=meses)
+            # Índice de búsqueda: se arma una vez por dataset, no en cada tecla
+            obtener_artefacto(handle, 'indice_busqueda', IndiceBusqueda)
+            obtener_artefacto(handle, 'cubo_mensual', CuboMensual)
+            obtener_artefacto(handle, 'opciones_secciones', opciones_secciones)
+            obtener_artefacto(handle, 'indice_orden', IndiceOrden)
+        resultado = {
+            'handle': handle,
+            # El selector permite todo el período de la sesión y parte en lo recién subido
+            'min_date': min_date.date(),
+            'max_date': max_date.date(),
+            'start_date': df['DD'].min().date(),
+            'end_date': df['DD'].max().date(),
+        }
+        _actualizar(trabajo_id, etapa='listo', filas=len(df), resultado=resultado, fin=time.time())
+        print(f"✅ Trabajo {trabajo_id} listo ({len(df):,} filas)")
+    except Exception as e:
+        print(f"❌ Error al indexar el trabajo {trabajo_id}: {e}")
+        _actualizar(trabajo_id, etapa='error', error=str(e), fin=time.time())
+
+
+def _al_terminar(trabajo_id, numero, session_id, futuro):
+    if _progreso is not None:
+        _progreso.pop((trabajo_id, numero), None)
+    try:
+        os.remove(_ruta_avance(trabajo_id, numero))
+    except OSError:
+        pass
+    try:
+        clave, df, mediciones = futuro.result()
+    except Exception as e:
+        if not isinstance(e, ErrorIngesta):
+            print(f"❌ Error en el trabajo {trabajo_id}: {e}")
+        _actualizar(trabajo_id, etapa='error', error=str(e), fin=time.time())
+        return
+    registrar_mediciones(mediciones)
+
+    with _lock:
+        trabajo = _trabajos.get(trabajo_id)
+        if trabajo is None or trabajo['etapa'] == 'error':
+            return
+        trabajo['parciales'][numero] = (clave, df)
+        trabajo['pendientes'] -= 1
+        _persistir(trabajo_id, trabajo)
+        if trabajo['pendientes'] > 0:
+            return
+        parciales = trabajo.pop('parciales')
+    _indexador.submit(_indexar, trabajo_id, parciales, session_id)
+
+
+def encolar_upload(filepaths, session_id=None):
+    """
+    Manda los archivos al pool de procesos (uno por proceso) y retorna el id
+    del trabajo. El trabajo queda listo cuando terminan todos.
+    """
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    trabajo_id = uuid.uuid4().hex
+    with _lock:
+        _iniciar()
+        _trabajos[trabajo_id] = {
+            'etapa': 'en_cola', 'filas': 0, 'error': None, 'resultado': None,
+            'archivos': len(filepaths), 'pendientes': len(filepaths), 'parciales': [None] * len(filepaths),
+            'inicio': time.time(), 'fin': None,
+        }
+        _persistir(trabajo_id, _trabajos[trabajo_id])
+        # Se olvidan los terminados más antiguos (siguen en disco); los que corren no
+        terminados = [t for t, trabajo in _trabajos.items() if trabajo['etapa'] in ('listo', 'error')]
+        for viejo_id in terminados[:max(len(_trabajos) - MAX_TRABAJOS, 0)]:
+            del _trabajos[viejo_id]
+    _limpiar_persistidos()
+
+    for numero, filepath in enumerate(filepaths):
+        futuro = _pool.submit(_ejecutar, trabajo_id, numero, filepath, _progreso)
+        futuro.add_done_callback(lambda f, numero=numero: _al_terminar(trabajo_id, numero, session_id, f))
+        print(f"🧵 Trabajo {trabajo_id} encolado: {filepath}")
+    return trabajo_id
+
+
+def estado_trabajo(trabajo_id):
+    """
+    Estado actual del trabajo: etapa, filas procesadas, error y resultado
+    (handle del dataset y rango de fechas cuando la etapa es 'listo').
+    Con varios archivos la etapa es la del archivo más atrasado. Un trabajo
+    encolado por otro worker se lee de su estado en disco.
+    Retorna None si el trabajo no existe.
+    """
+    with _lock:
+        trabajo = _trabajos.get(trabajo_id)
+        estado = {k: v for k, v in trabajo.items() if k != 'parciales'} if trabajo is not None else None
+    if estado is None:
+        estado = _leer_persistido(trabajo_id)
+    if estado is None:
+        return None
+
+    if estado['etapa'] not in ('indexando', 'listo', 'error'):
+        avances = [_avance(trabajo_id, numero) for numero in range(estado['archivos'])]
+        avances = [avance for avance in avances if avance is not None]
+        if avances:
+            estado['etapa'] = min((etapa for etapa, _ in avances), key=ETAPAS.index)
+            estado['filas'] = sum(filas for _, filas in avances)
+    estado['mensaje'] = MENSAJES_ETAPA.get(estado['etapa'], estado['etapa'])
+    return estado
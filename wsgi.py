@@ -0,0 +1,15 @@
+"""
+Punto de entrada WSGI para servir el dashboard con varios workers, por ejemplo:
+
+    gunicorn wsgi:server --workers 4 --bind 0.0.0.0:8050 --timeout 300
+
+Cada worker es un proceso con su propio almacén en memoria; lo que comparten
+está en disco: los datasets en cache/datasets (Arrow mapeado en memoria, así
+las páginas de un mismo dataset las comparte el sistema operativo), las
+particiones de cada sesión en cache/sesiones y el estado de los trabajos de
+ingesta en cache/trabajos. Sin PyArrow un dataset solo lo ve el worker que lo
+registró, así que para varios workers PyArrow es necesario.
+"""
+from app import app
+
+server = app.server